@@ -0,0 +1,21 @@
+"""
+pytest configuration for the srpo benchmarks.
+
+Run with pytest-benchmark installed, eg:
+
+    pytest benchmarks --benchmark-json=results.json
+"""
+import pytest
+
+from srpo.core import set_registry_path, terminate_all
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def bench_registry_path(tmp_path_factory):
+    """ Use a temporary registry so running servers are not affected. """
+    path = tmp_path_factory.getbasetemp() / "srpo_bench_registry.sqlite"
+    with set_registry_path(path):
+        yield path
+    terminate_all(path)
@@ -0,0 +1,90 @@
+"""
+Benchmarks of srpo, see also srpo.benchmark and the "srpo bench" command.
+"""
+import pytest
+
+from srpo import get_proxy, terminate, transcend
+from srpo.benchmark import (
+    BenchObject,
+    QUICK_PAYLOAD_SIZES,
+    bench_concurrency,
+    bench_import,
+    get_payloads,
+)
+from srpo.core import _maybe_unwrap_value
+
+PAYLOADS = get_payloads(QUICK_PAYLOAD_SIZES + (2 ** 20,))
+
+
+@pytest.fixture(scope="module")
+def bench_proxy():
+    """ Transcend a BenchObject, return its proxy, then cleanup. """
+    name = "bench_object"
+    proxy = transcend(BenchObject(key=1), name)
+    yield proxy
+    terminate(name)
+
+
+class TestStartup:
+    def test_import(self, benchmark):
+        """ Time importing srpo and srpo.core in new interpreters. """
+        benchmark.pedantic(bench_import, kwargs=dict(number=1), rounds=5)
+
+    def test_transcend(self, benchmark):
+        """ Time transcending an object. """
+        names = []
+
+        def _transcend():
+            names.append(f"bench_transcend_{len(names)}")
+            transcend(BenchObject(), names[-1])
+
+        benchmark.pedantic(_transcend, rounds=5)
+        for name in names:
+            terminate(name)
+
+    def test_get_proxy(self, benchmark, bench_proxy):
+        """ Time creating a new (not pooled) proxy. """
+
+        def _get_proxy():
+            get_proxy(bench_proxy._name, pooled=False)._release()
+
+        benchmark(_get_proxy)
+
+
+class TestCalls:
+    def test_null_call(self, benchmark, bench_proxy):
+        """ Time calling a method which does nothing. """
+        benchmark(bench_proxy.noop)
+
+    def test_getitem(self, benchmark, bench_proxy):
+        """ Time getting an item. """
+        benchmark(bench_proxy.__getitem__, "key")
+
+    def test_setitem(self, benchmark, bench_proxy):
+        """ Time setting an item. """
+        benchmark(bench_proxy.__setitem__, "key", 1)
+
+
+class TestPayloads:
+    @pytest.mark.parametrize("key", sorted(PAYLOADS))
+    def test_unwrap(self, benchmark, key):
+        """ Time _maybe_unwrap_value over payload types and sizes. """
+        benchmark(_maybe_unwrap_value, PAYLOADS[key], None)
+
+    @pytest.mark.parametrize("key", sorted(PAYLOADS))
+    def test_round_trip(self, benchmark, bench_proxy, key):
+        """ Time sending a payload to the server and back. """
+        benchmark(bench_proxy.echo, PAYLOADS[key])
+
+
+class TestConcurrency:
+    @pytest.mark.parametrize("server_threads", [1, 4])
+    @pytest.mark.parametrize("clients", [1, 2, 4, 8])
+    def test_null_call_throughput(
+        self, benchmark, bench_registry_path, clients, server_threads
+    ):
+        """ Time null calls from many client processes. """
+        kwargs = dict(clients=(clients,), server_threads=(server_threads,))
+        benchmark.pedantic(
+            bench_concurrency, args=(bench_registry_path,), kwargs=kwargs, rounds=3
+        )
@@ -15,7 +15,7 @@ PACKAGE_NAME = "srpo"
 
 # define python versions
 
-python_version = (3, 6)  # tuple of major, minor version requirement
+python_version = (3, 8)  # tuple of major, minor version requirement
 python_version_str = str(python_version[0]) + "." + str(python_version[1])
 
 # produce an error message if the python version is less than required
@@ -89,8 +89,7 @@ setup(
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
         "License :: OSI Approved :: GNU Lesser General Public License v3 or later (LGPLv3+)",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
         "Topic :: Scientific/Engineering",
     ],
     test_suite="tests",
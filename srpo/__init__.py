@@ -1,6 +1,48 @@
 # -*- coding: utf-8 -*-
+"""
+Share python objects between processes.
 
-import srpo
+The public names are imported from their modules on first access, so
+importing srpo is cheap until something is used.
+"""
+import importlib
 
-from srpo.core import transcend, get_proxy, terminate, get_registry
 from srpo.version import __version__
+
+# public name -> the module it is defined in
+_EXPORTS = dict(
+    transcend="srpo.core",
+    transcend_sharded="srpo.core",
+    get_proxy="srpo.core",
+    get_async_proxy="srpo.core",
+    terminate="srpo.core",
+    get_registry="srpo.core",
+    set_registry_path="srpo.core",
+    start_warm_pool="srpo.core",
+    stop_warm_pool="srpo.core",
+    read_only="srpo.concurrency",
+    mutating="srpo.concurrency",
+    coalesce="srpo.concurrency",
+    memoize="srpo.cache",
+)
+
+__all__ = ["__version__", *_EXPORTS]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    else:  # submodules, eg srpo.core after only importing srpo
+        try:
+            value = importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+            msg = f"module {__name__!r} has no attribute {name!r}"
+            raise AttributeError(msg) from None
+    globals()[name] = value  # later lookups skip this function
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,327 @@
+"""
+Benchmarks of srpo's import time, startup, call latency, payload scaling and
+concurrency.
+
+Results are plain data so they can be saved as JSON and compared between
+versions (see compare_results). Each timing is a dict of statistics of the
+seconds taken per operation.
+
+NumPy and pandas payloads are only measured when they are installed.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import product
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from srpo.core import _maybe_unwrap_value, get_proxy, terminate, transcend
+from srpo.version import __version__
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # optional dependency
+    pd = None
+
+# payload sizes, in bytes, used by default and in quick mode
+PAYLOAD_SIZES = (2 ** 10, 2 ** 16, 2 ** 20, 2 ** 24)
+QUICK_PAYLOAD_SIZES = (2 ** 10, 2 ** 16)
+
+
+class BenchObject(dict):
+    """ A dict with a few methods to call remotely. """
+
+    def noop(self):
+        """ Do nothing. """
+
+    def echo(self, value):
+        """ Return value. """
+        return value
+
+
+def _summarize(timings: Sequence[float]) -> dict:
+    """ Return statistics of a sequence of timings (in seconds). """
+    return dict(
+        n=len(timings),
+        min=min(timings),
+        max=max(timings),
+        mean=statistics.mean(timings),
+        median=statistics.median(timings),
+    )
+
+
+def _time(func, number: int, warmup: int = 1) -> dict:
+    """ Time number calls of func, after warmup untimed calls. """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return _summarize(timings)
+
+
+def _unique_name(prefix: str) -> str:
+    """ Return a name which won't collide with other transcended objects. """
+    return f"srpo_bench_{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+@contextmanager
+def _transcended(registry_path, **kwargs):
+    """ Transcend a BenchObject, yield its proxy, then terminate it. """
+    name = _unique_name("obj")
+    proxy = transcend(BenchObject(), name, registry_path=registry_path, **kwargs)
+    try:
+        yield proxy
+    finally:
+        terminate(name, registry_path=registry_path)
+
+
+def get_payloads(sizes: Sequence[int] = PAYLOAD_SIZES) -> dict:
+    """
+    Return {"{kind}.{size}": payload} of roughly size bytes for each kind.
+
+    Kinds are bytes, numpy (a float64 array) and pandas (a one column
+    DataFrame); the latter two only if they are installed.
+    """
+    out = {}
+    for size in sizes:
+        out[f"bytes.{size}"] = bytes(size)
+        if np is not None:
+            array = np.zeros(max(size // 8, 1))
+            out[f"numpy.{size}"] = array
+            if pd is not None:
+                out[f"pandas.{size}"] = pd.DataFrame({"a": array})
+    return out
+
+
+# --- individual benchmarks
+
+# imports modules in a fresh interpreter and prints the seconds taken by each
+_IMPORT_SCRIPT = """
+import sys, time
+for name in sys.argv[1:]:
+    start = time.perf_counter()
+    __import__(name)
+    print(time.perf_counter() - start)
+"""
+
+# the modules timed by bench_import, each after the ones before it
+IMPORT_MODULES = ("srpo", "srpo.core")
+
+
+def bench_import(number: int = 5, modules: Sequence[str] = IMPORT_MODULES) -> dict:
+    """
+    Time importing modules in new interpreters.
+
+    Each module is timed after the previous ones are imported, so the time
+    for "srpo.core" doesn't include importing the srpo package.
+    """
+    command = [sys.executable, "-c", _IMPORT_SCRIPT, *modules]
+    timings = {x: [] for x in modules}
+    for _ in range(number):
+        out = subprocess.run(command, check=True, capture_output=True, text=True)
+        for module, seconds in zip(modules, out.stdout.split()):
+            timings[module].append(float(seconds))
+    return {f"import.{x}": _summarize(y) for x, y in timings.items()}
+
+
+def bench_transcend(registry_path, number: int = 5) -> dict:
+    """ Time transcending (and so starting a server for) a small object. """
+    timings = []
+    for _ in range(number):
+        name = _unique_name("transcend")
+        start = time.perf_counter()
+        transcend(BenchObject(), name, registry_path=registry_path)
+        timings.append(time.perf_counter() - start)
+        terminate(name, registry_path=registry_path)
+    return _summarize(timings)
+
+
+def bench_get_proxy(registry_path, number: int = 20) -> dict:
+    """ Time creating a new (not pooled) proxy to a running server. """
+    with _transcended(registry_path) as proxy:
+        name = proxy._name
+        kwargs = dict(registry_path=registry_path, pooled=False)
+        timings = []
+        for _ in range(number):
+            start = time.perf_counter()
+            new = get_proxy(name, **kwargs)
+            timings.append(time.perf_counter() - start)
+            new._release()
+    return _summarize(timings)
+
+
+def bench_calls(registry_path, number: int = 1000) -> dict:
+    """ Time a method call doing nothing, and setting and getting items. """
+    with _transcended(registry_path) as proxy:
+        proxy["key"] = 1
+        return {
+            "null_call": _time(proxy.noop, number),
+            "getitem": _time(lambda: proxy["key"], number),
+            "setitem": _time(lambda: proxy.__setitem__("key", 1), number),
+        }
+
+
+def bench_payloads(registry_path, sizes=PAYLOAD_SIZES, number: int = 10) -> dict:
+    """
+    Time unwrapping and round tripping payloads of increasing size.
+
+    "unwrap" is the cost of _maybe_unwrap_value, which servers pay for every
+    argument and result; "round_trip" sends a payload to the server and back.
+    """
+    out = {}
+    payloads = get_payloads(sizes)
+    for key, value in payloads.items():
+        unwrap = lambda: _maybe_unwrap_value(value, None)  # noqa: E731
+        out[f"unwrap.{key}"] = _time(unwrap, number)
+    with _transcended(registry_path) as proxy:
+        for key, value in payloads.items():
+            out[f"round_trip.{key}"] = _time(lambda: proxy.echo(value), number)
+    return out
+
+
+def _run_client(name, registry_path, number):
+    """ Make number null calls from a client process, return (start, end). """
+    proxy = get_proxy(name, registry_path=registry_path, pooled=False)
+    proxy.noop()
+    start = time.time()
+    for _ in range(number):
+        proxy.noop()
+    end = time.time()
+    proxy._release()
+    return start, end
+
+
+def bench_concurrency(
+    registry_path,
+    clients: Sequence[int] = (1, 2, 4, 8),
+    server_threads: Sequence[int] = (1, 4),
+    number: int = 200,
+) -> dict:
+    """
+    Measure null call throughput with many client processes.
+
+    Each client makes number calls; the seconds per call is the time from
+    the first client starting to the last finishing divided by all calls.
+    """
+    out = {}
+    for threads, n_clients in product(server_threads, clients):
+        with _transcended(registry_path, server_threads=threads) as proxy:
+            args = (proxy._name, registry_path, number)
+            with ProcessPoolExecutor(n_clients) as executor:
+                futures = [
+                    executor.submit(_run_client, *args) for _ in range(n_clients)
+                ]
+                spans = [x.result() for x in futures]
+        elapsed = max(x[1] for x in spans) - min(x[0] for x in spans)
+        per_call = elapsed / (number * n_clients)
+        stats = _summarize([per_call])
+        stats["calls_per_second"] = 1 / per_call if per_call else float("inf")
+        out[f"concurrency.clients_{n_clients}.threads_{threads}"] = stats
+    return out
+
+
+# --- running, saving and comparing
+
+
+def run_benchmarks(
+    quick: bool = False, registry_path: Optional[Union[str, Path]] = None
+) -> dict:
+    """
+    Run all the benchmarks, return the results with some metadata.
+
+    Parameters
+    ----------
+    quick
+        If True run fewer iterations over smaller payloads; useful for a
+        smoke test but too noisy to catch small regressions.
+    registry_path
+        The registry to use; by default a temporary one so running servers
+        are not affected.
+    """
+    scale = 10 if quick else 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(registry_path or Path(tmp) / "srpo_bench_registry.sqlite")
+        results = bench_import(number=max(10 // scale, 3))
+        results["transcend"] = bench_transcend(path, number=max(5 // scale, 2))
+        results["get_proxy"] = bench_get_proxy(path, number=20 // scale)
+        results.update(bench_calls(path, number=1000 // scale))
+        sizes = QUICK_PAYLOAD_SIZES if quick else PAYLOAD_SIZES
+        results.update(bench_payloads(path, sizes=sizes, number=10 // scale + 2))
+        clients = (1, 2) if quick else (1, 2, 4, 8)
+        results.update(bench_concurrency(path, clients, number=200 // scale))
+    return dict(
+        metadata=dict(
+            srpo_version=__version__,
+            python=sys.version.split()[0],
+            platform=platform.platform(),
+            time=time.time(),
+            quick=quick,
+        ),
+        results=results,
+    )
+
+
+def save_results(results: dict, path: Union[str, Path]):
+    """ Write the output of run_benchmarks to a JSON file. """
+    Path(path).write_text(json.dumps(results, indent=2, sort_keys=True))
+
+
+def load_results(path: Union[str, Path]) -> dict:
+    """ Read results written by save_results. """
+    return json.loads(Path(path).read_text())
+
+
+def compare_results(old: dict, new: dict, tolerance: float = 0.25) -> dict:
+    """
+    Return {benchmark: ratio} of benchmarks which got slower.
+
+    The ratio is the new median time over the old one; benchmarks are
+    reported when it exceeds 1 + tolerance. Benchmarks missing from either
+    result are ignored.
+
+    Parameters
+    ----------
+    old
+        The baseline results, from run_benchmarks or load_results.
+    new
+        The results to check.
+    tolerance
+        The fraction by which a benchmark may slow down before it is
+        considered a regression.
+    """
+    old_results, new_results = old["results"], new["results"]
+    out = {}
+    for name in sorted(set(old_results) & set(new_results)):
+        before, after = old_results[name]["median"], new_results[name]["median"]
+        if before <= 0:
+            continue
+        ratio = after / before
+        if ratio > 1 + tolerance:
+            out[name] = ratio
+    return out
+
+
+def format_results(results: dict) -> str:
+    """ Return a table of the results from run_benchmarks. """
+    lines = [f"{'benchmark':<44}{'median ms':>12}{'min ms':>12}{'n':>8}"]
+    for name, stats in sorted(results["results"].items()):
+        lines.append(
+            f"{name:<44}{stats['median'] * 1000:>12.4f}"
+            f"{stats['min'] * 1000:>12.4f}{stats['n']:>8}"
+        )
+    return "\n".join(lines)
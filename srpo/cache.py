@@ -0,0 +1,149 @@
+"""
+Memoization of the serialized results of methods on servers.
+
+Results of memoized methods are cached, already serialized, keyed by the
+method and its (hashable) arguments, with their types. The cache is bounded
+by the total size of the results, evicting the least recently used, and
+entries may expire after a time to live. Servers clear it whenever the
+object may change.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from srpo.concurrency import get_marked_methods
+
+# attribute set on functions by the memoize decorator
+_MEMOIZE_MARKER = "__srpo_memoize__"
+
+
+def memoize(func):
+    """
+    Mark a method as memoized.
+
+    The server caches the result of each call by its arguments until the
+    object is changed, so the result must only depend on the arguments and
+    the object's state. Memoized methods are read-only.
+    """
+    setattr(func, _MEMOIZE_MARKER, True)
+    return func
+
+
+def get_memoize_methods(
+    obj, methods: Sequence[str], names: Sequence[str] = ()
+) -> frozenset:
+    """ Return the names of methods of obj to memoize, see memoize. """
+    return get_marked_methods(obj, methods, names, _MEMOIZE_MARKER)
+
+
+def _typed(value):
+    """ Return value paired with its type, and those of any items. """
+    if isinstance(value, tuple):
+        return type(value), tuple(_typed(x) for x in value)
+    if isinstance(value, frozenset):
+        return type(value), frozenset(_typed(x) for x in value)
+    return type(value), value
+
+
+def make_key(name: str, args=(), kwargs=None, extra=()):
+    """
+    Return a key for a call of method name, or None if it can't be cached.
+
+    Unlike functools.lru_cache's default, equal arguments of different
+    types (eg 1, 1.0 and True) get different keys, since a method may
+    return different results for them.
+    """
+    kwargs = tuple(sorted((k, _typed(v)) for k, v in (kwargs or {}).items()))
+    key = (name, _typed(tuple(args)), kwargs, extra)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ResultCache:
+    """
+    A thread safe LRU cache of serialized results bounded by their size.
+
+    Parameters
+    ----------
+    max_bytes
+        The total size of the results to keep.
+    ttl
+        If not None, the seconds after which an entry expires.
+    """
+
+    def __init__(self, max_bytes: int = 2 ** 26, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # incremented by clear so results computed before it aren't stored
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires)
+        self._bytes = 0
+
+    def get(self, key) -> Optional[bytes]:
+        """ Return the cached value for key, or None if there isn't one. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None:
+                if entry[1] < time.monotonic():
+                    self._remove(key)
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value: bytes, generation: Optional[int] = None):
+        """
+        Cache value under key.
+
+        If generation is given (see the attribute) and the cache has been
+        cleared since, the value may be stale and is not stored.
+        """
+        if len(value) > self.max_bytes:
+            return
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        """ Remove an entry, the lock must be held. """
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self):
+        """ Remove every entry, eg because the object changed. """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """ Return the hit, miss and eviction counts and the cache's size. """
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                ttl=self.ttl,
+            )
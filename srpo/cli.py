@@ -1,26 +1,36 @@
 """
 SRPOS CLI
 """
+import time
+from pathlib import Path
 from pprint import pprint
 from typing import Optional
 
-import psutil
 import typer
 
 import srpo
-from srpo.core import terminate, terminate_all
+from srpo.core import get_proxy, terminate, terminate_all
+from srpo.serialize import loads
+from srpo.stats import format_stats
 
 app = typer.Typer()
 
 
 @app.command()
-def ls(registry_path=None):
+def ls(registry_path: Optional[str] = None):
     """
     List all the srp processes current registered.
+
+    Parameters
+    ----------
+    registry_path
+        The registry to list; "dir://<path>" or "shm://<name>" select the
+        directory or shared memory backends. Defaults to the
+        SRPO_REGISTRY_PATH environment variable, else ~/.srpo_registry.sqlite.
     """
-    registry = dict(srpo.get_registry(registry_path=registry_path))
-    print("SRPO registered objects:")
-    pprint(registry)
+    registry = srpo.get_registry(registry_path=registry_path)
+    print(f"SRPO registered objects ({registry!r}):")
+    pprint(dict(registry))
 
 
 @app.command()
@@ -43,5 +53,119 @@ def kill(
         terminate(name, registry_path=registry_path)
 
 
+@app.command()
+def stats(name: str, registry_path: Optional[str] = None, reset: bool = False):
+    """
+    Show the per-method metrics of a srpo server.
+
+    Parameters
+    ----------
+    name
+        The registered name of the srpo object.
+    reset
+        If True clear the metrics after showing them.
+    """
+    proxy = get_proxy(name, registry_path=registry_path, pooled=False)
+    try:
+        print(f"SRPO metrics for {name}:")
+        print(format_stats(loads(proxy.obj.metrics())))
+        memo = loads(proxy.obj.memo_stats())
+        if memo["hits"] or memo["misses"]:
+            print(
+                f"memoized results: {memo['hits']} hits, {memo['misses']} misses, "
+                f"{memo['entries']} entries ({memo['bytes']} bytes)"
+            )
+        if reset:
+            proxy.obj.reset_metrics()
+    finally:
+        proxy._release()
+
+
+@app.command()
+def profile(
+    name: str,
+    seconds: float = 10.0,
+    output: Optional[str] = None,
+    sample: bool = False,
+    interval: float = 0.005,
+    registry_path: Optional[str] = None,
+):
+    """
+    Profile a running srpo server and write the profile to a file.
+
+    Parameters
+    ----------
+    name
+        The registered name of the srpo object.
+    seconds
+        How long to profile for.
+    output
+        The file to write; defaults to NAME.pstats (or NAME.collapsed).
+    sample
+        If True sample the stacks of all server threads and write them in
+        the collapsed stack format, else write a cProfile pstats file.
+    interval
+        The seconds between stack samples.
+    """
+    mode = "sample" if sample else "cprofile"
+    suffix = ".collapsed" if sample else ".pstats"
+    path = Path(output or f"{name}{suffix}")
+    proxy = get_proxy(name, registry_path=registry_path, pooled=False)
+    try:
+        proxy.obj.start_profile(mode, interval)
+        try:
+            time.sleep(seconds)
+        finally:
+            data = proxy.obj.stop_profile()
+    finally:
+        proxy._release()
+    path.write_bytes(data)
+    print(f"SRPO profile of {name} written to {path}")
+
+
+@app.command()
+def bench(
+    output: Optional[str] = None,
+    compare: Optional[str] = None,
+    tolerance: float = 0.25,
+    quick: bool = False,
+):
+    """
+    Run the srpo benchmarks, optionally saving and comparing the results.
+
+    Parameters
+    ----------
+    output
+        A JSON file to write the results to.
+    compare
+        A JSON file of earlier results; exit with an error if any benchmark
+        is more than tolerance slower.
+    tolerance
+        The fraction a benchmark may slow down before it is a regression.
+    quick
+        If True run fewer iterations over smaller payloads.
+    """
+    # imported here as the benchmarks import numpy and pandas if installed
+    from srpo.benchmark import (
+        compare_results,
+        format_results,
+        load_results,
+        run_benchmarks,
+        save_results,
+    )
+
+    results = run_benchmarks(quick=quick)
+    print(format_results(results))
+    if output:
+        save_results(results, output)
+        print(f"SRPO benchmark results written to {output}")
+    if compare:
+        regressions = compare_results(load_results(compare), results, tolerance)
+        for name, ratio in regressions.items():
+            print(f"regression: {name} is {ratio:.2f}x slower")
+        if regressions:
+            raise typer.Exit(code=1)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,243 @@
+"""
+Control of which operations on a transcended object may run concurrently.
+
+Methods can be declared read-only (safe to run alongside other reads) or
+mutating with the read_only and mutating decorators, or by passing names or
+a policy to transcend. Under the "rw" concurrency mode reads share a
+reader-writer lock and writes hold it exclusively.
+
+Methods can also be declared coalescable, so identical calls made at the
+same time share a single execution (see SingleFlight).
+"""
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional, Sequence, Union
+
+# attribute set on functions by the read_only and mutating decorators
+_MARKER = "__srpo_read_only__"
+# attribute set on functions by the coalesce decorator
+_COALESCE_MARKER = "__srpo_coalesce__"
+
+# the supported values of transcend's concurrency argument
+CONCURRENCY_MODES = (None, "serial", "rw")
+
+
+def read_only(func):
+    """
+    Mark a method as read-only so it may run alongside other reads.
+
+    Examples
+    --------
+    >>> class Bank:
+    ...     @read_only
+    ...     def read_index(self):
+    ...         ...
+    """
+    setattr(func, _MARKER, True)
+    return func
+
+
+def mutating(func):
+    """ Mark a method as changing its object so it always runs alone. """
+    setattr(func, _MARKER, False)
+    return func
+
+
+def coalesce(func):
+    """
+    Mark a method as coalescable.
+
+    Calls with equal arguments which arrive while one is running share its
+    result rather than running again, so the method should be read-only
+    and its result should only depend on its arguments and the object.
+    """
+    setattr(func, _COALESCE_MARKER, True)
+    return func
+
+
+def get_marked_methods(
+    obj, methods: Sequence[str], names: Sequence[str], marker: str
+) -> frozenset:
+    """ Return the names of methods of obj listed in names or marked. """
+    names = set(names)
+    return frozenset(
+        x
+        for x in methods
+        if x in names or getattr(getattr(obj, x, None), marker, False)
+    )
+
+
+def get_coalesce_methods(
+    obj, methods: Sequence[str], names: Sequence[str] = ()
+) -> frozenset:
+    """ Return the names of methods of obj to coalesce, see coalesce. """
+    return get_marked_methods(obj, methods, names, _COALESCE_MARKER)
+
+
+def get_read_methods(
+    obj,
+    methods: Sequence[str],
+    read_only: Optional[Union[Sequence[str], Callable[[str], bool]]] = None,
+) -> frozenset:
+    """
+    Return the names of the read-only methods of obj.
+
+    Names listed in read_only are read-only, then decorated methods use
+    their mark, then (if read_only is callable) the policy decides. Other
+    methods are assumed to mutate the object.
+
+    Parameters
+    ----------
+    obj
+        The object being transcended.
+    methods
+        The names of the methods of obj.
+    read_only
+        A sequence of method names, or a callable which takes a method name
+        and returns True if the method is read-only.
+    """
+    names = set() if callable(read_only) or read_only is None else set(read_only)
+    out = set()
+    for name in methods:
+        marked = getattr(getattr(obj, name, None), _MARKER, None)
+        if name in names:
+            out.add(name)
+        elif marked is not None:
+            if marked:
+                out.add(name)
+        elif callable(read_only) and read_only(name):
+            out.add(name)
+    return frozenset(out)
+
+
+class RWLock:
+    """
+    A reader-writer lock which prefers writers.
+
+    Any number of threads may hold the read lock at once while the write
+    lock is exclusive. Once a writer is waiting new readers wait too, so a
+    stream of reads can't starve writes. The thread holding the write lock
+    may take either lock again (eg when serving a nested request); the
+    read lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # the id of the thread holding the write lock
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """ Hold the lock shared with other readers. """
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._writer is None and not self._writers_waiting
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """ Hold the lock exclusively. """
+        thread_id = threading.get_ident()
+        if self._writer == thread_id:
+            yield
+            return
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                self._condition.wait_for(
+                    lambda: self._writer is None and not self._readers
+                )
+            finally:
+                self._writers_waiting -= 1
+            self._writer = thread_id
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
+
+
+class AccessControl:
+    """
+    Decide how an operation on a transcended object is guarded.
+
+    Parameters
+    ----------
+    mode
+        None to run operations without locking, "serial" to run one at a
+        time, or "rw" to let reads run concurrently.
+    read_methods
+        The names of methods which are read-only.
+    """
+
+    def __init__(self, mode: Optional[str] = None, read_methods=frozenset()):
+        if mode not in CONCURRENCY_MODES:
+            raise ValueError(f"unknown concurrency mode {mode}")
+        self.mode = mode
+        self.read_methods = frozenset(read_methods)
+        self._lock = RWLock()
+
+    def is_read(self, kind: str, name: Optional[str], read_kinds) -> bool:
+        """ Return True if an operation only reads the object. """
+        if kind == "call":
+            return name in self.read_methods
+        return kind in read_kinds
+
+    def guard(self, read: bool):
+        """ Return a context manager which guards one operation. """
+        if self.mode is None:
+            return nullcontext()
+        if read and self.mode == "rw":
+            return self._lock.read()
+        return self._lock.write()
+
+
+class SingleFlight:
+    """
+    Run a function once for all concurrent callers with the same key.
+
+    The first caller (the leader) runs the function; callers with an equal
+    key which arrive before it finishes wait for, and share, its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def run(self, key, func) -> tuple:
+        """
+        Return (func(), shared) where shared is True if the result came from
+        another caller's run.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            value = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                del self._flights[key]
+        return value, False
@@ -1,32 +1,91 @@
 """
 Core module of srpo.
 """
-import multiprocessing
+import hashlib
+import importlib
 import os
+import pickle
+import queue
+import select
+import signal
+import sys
+import tempfile
+import threading
 import time
-from contextlib import suppress
+import uuid
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from itertools import chain, count, islice
+from types import GeneratorType
+from concurrent.futures import Future
+from contextlib import nullcontext, suppress
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Union
+
+from srpo.cache import ResultCache, get_memoize_methods, make_key
+from srpo.concurrency import (
+    CONCURRENCY_MODES,
+    AccessControl,
+    SingleFlight,
+    get_coalesce_methods,
+    get_read_methods,
+)
+from srpo.exceptions import SrpoConnectionError, SrpoOneWayError
+from srpo.lazy import LazyModule
+from srpo.registry import open_registry
+from srpo.serialize import (
+    compress,
+    dumps,
+    dump_results,
+    get_codecs,
+    load_results,
+    loads,
+    remove_segments,
+    uses_shared_memory,
+)
+from srpo.stats import Metrics
+
+
+def _configure_rpyc(rpyc):
+    """ Import the parts of rpyc srpo uses and set its default config. """
+    for module in ("rpyc.utils.classic", "rpyc.utils.factory", "rpyc.utils.server"):
+        importlib.import_module(module)
+    # enable pickling in rpyc, 'cause living on the edge is the only way to live
+    rpyc.core.protocol.DEFAULT_CONFIG["allow_pickle"] = True
+    rpyc.core.protocol.DEFAULT_CONFIG["allow_all_attrs"] = True
+    rpyc.core.protocol.DEFAULT_CONFIG["allow_public_attrs"] = True
+    rpyc.core.protocol.DEFAULT_CONFIG["propagate_KeyboardInterrupt_locally"] = True
+
+
+# These are slow to import and many processes (eg ones which only get a lazy
+# proxy, or run the CLI) never use them, so they are imported on first use.
+asyncio = LazyModule("asyncio")
+multiprocessing = LazyModule("multiprocessing")
+profiling = LazyModule("srpo.profiling")
+psutil = LazyModule("psutil")
+rpyc = LazyModule("rpyc", on_import=_configure_rpyc)
+
+# State for where the simple registry is found, the default can be set with
+# the SRPO_REGISTRY_PATH environment variable (eg to use another backend)
+_DEFAULT_REGISTRY_PATH = os.environ.get("SRPO_REGISTRY_PATH") or (
+    Path().home() / ".srpo_registry.sqlite"
+)
+_REGISTRY_STATE = dict(
+    default=_DEFAULT_REGISTRY_PATH,
+    current=_DEFAULT_REGISTRY_PATH,
+)
 
-import psutil
-import rpyc
-from rpyc import Service
-from rpyc.utils.classic import obtain
-from rpyc.utils.server import ThreadPoolServer
-from sqlitedict import SqliteDict
 
-from srpo.exceptions import SrpoConnectionError
+# Unix domain sockets are used by default where they are well supported
+_USE_UNIX_SOCKET = sys.platform.startswith("linux")
 
-# enable pickling in rpyc, 'cause living on the edge is the only way to live
-rpyc.core.protocol.DEFAULT_CONFIG["allow_pickle"] = True
-rpyc.core.protocol.DEFAULT_CONFIG["allow_all_attrs"] = True
-rpyc.core.protocol.DEFAULT_CONFIG["allow_public_attrs"] = True
-rpyc.core.protocol.DEFAULT_CONFIG["propagate_KeyboardInterrupt_locally"] = True
+# Seconds to wait for a transcended server to start listening
+_STARTUP_TIMEOUT = 10
 
-# State for where the simple registry is found
-_REGISTRY_STATE = dict(
-    default=Path().home() / ".srpo_registry.sqlite",
-    current=Path().home() / ".srpo_registry.sqlite",
+_STREAM_STATE = dict(
+    # the number of items fetched per message when iterating remote iterators
+    chunk_size=1000,
 )
 
 
@@ -41,7 +100,7 @@ def _maybe_unwrap_value(value, cls):
         return value
     # else try to pickle and de-pickle return object to get rid of netref.
     try:
-        return obtain(value)
+        return rpyc.utils.classic.obtain(value)
     except Exception:  # cant pickle this whatever it is, just return
         return value
 
@@ -52,13 +111,219 @@ def _unpack_input_outputs(self, name, doc):
     def _func(self, *args, **kwargs):
         args = _maybe_unwrap_value(args, None)
         kwargs = _maybe_unwrap_value(kwargs, None)
-        value = getattr(self.obj, name)(*args, **kwargs)
+        start, error = time.perf_counter(), True
+        try:
+            with self._guard("call", name), self._profiled():
+                value = getattr(self.obj, name)(*args, **kwargs)
+            error = False
+        finally:
+            execution = time.perf_counter() - start
+            self._metrics.record(name, error=error, execution=execution)
+        if not self._access.is_read("call", name, _READ_KINDS):
+            self._bump_version()
         return _maybe_unwrap_value(value, type(self))
 
     setattr(_func, "__doc__", doc)
     return _func
 
 
+def _negotiate_compression(schema) -> tuple:
+    """
+    Return (codec, threshold, accepted codecs) for talking to a server.
+
+    The server's codecs (best first) are limited to those available here.
+    """
+    accepted = tuple(x for x in schema["codecs"] if x in get_codecs("auto"))
+    codec = accepted[0] if accepted else None
+    return codec, schema["compression_threshold"], accepted
+
+
+def _encode_calls(proxy, calls) -> bytes:
+    """ Serialize (and maybe compress) operations to send to the server. """
+    codec, threshold, _ = proxy._compression
+    return compress(dumps(calls, proxy._serializer), codec, threshold)
+
+
+# client side metrics of every proxy in this process, see get_client_metrics
+_CLIENT_METRICS = Metrics()
+
+
+def get_client_metrics() -> dict:
+    """
+    Return the metrics recorded by proxies in this process.
+
+    Keys are "{object name}.{method}" and latencies are round trip times.
+    """
+    return _CLIENT_METRICS.snapshot()
+
+
+def _send_calls(proxy, payload, method="batch") -> list:
+    """ Run encoded operations on the server, return the (success, value)s. """
+    start = time.perf_counter()
+    codecs = proxy._compression[2]
+    out = proxy._run_batch(payload, codecs, time.time(), proxy._proxy_id)
+    results = load_results(out)
+    _CLIENT_METRICS.record(
+        f"{proxy._name}.{method}",
+        error=not all(success for success, _ in results),
+        bytes_in=len(out) if isinstance(out, bytes) else 0,
+        bytes_out=len(payload),
+        round_trip=time.perf_counter() - start,
+    )
+    return results
+
+
+# sentinel for arguments which were not given
+_MISSING = object()
+
+
+class _IteratorHandle(NamedTuple):
+    """ Stands in for an iterator which stays on the server. """
+
+    iterator_id: int
+
+
+def _shareable(results) -> bool:
+    """ Return True if results can be sent to other proxies too. """
+    # an iterator can only be consumed by one proxy
+    return not any(isinstance(x, _IteratorHandle) for _, x in results)
+
+
+def _cacheable(results) -> bool:
+    """ Return True if results can be memoized. """
+    return _shareable(results) and all(success for success, _ in results)
+
+
+def set_stream_chunk_size(chunk_size: int):
+    """
+    Set the number of items fetched per message when iterating.
+
+    Parameters
+    ----------
+    chunk_size
+        The number of items sent in each chunk.
+    """
+    _STREAM_STATE["chunk_size"] = chunk_size
+
+
+def _stream(proxy, handle):
+    """
+    Yield the items of a server-side iterator, fetched in chunks.
+
+    The next chunk is requested while the current one is consumed, so at
+    most two chunks are held by the proxy and one by the server.
+    """
+    codecs = proxy._compression[2]
+    run_batch = proxy._run_batch_async
+
+    def _request():
+        call = ("next", handle.iterator_id, (_STREAM_STATE["chunk_size"],), {})
+        return run_batch(_encode_calls(proxy, [call]), codecs, time.time())
+
+    done = False
+    try:
+        pending = _request()
+        while not done:
+            ((success, value),) = load_results(pending.value)
+            if not success:
+                raise value
+            items, done = value
+            if not done:
+                pending = _request()
+            yield from items
+    finally:
+        if not done:
+            with suppress(Exception):
+                call = ("close_iter", handle.iterator_id, (), {})
+                _send_calls(proxy, _encode_calls(proxy, [call]), "close_iter")
+
+
+def _resolve_value(proxy, value):
+    """ Turn handles to server-side iterators into local generators. """
+    if isinstance(value, _IteratorHandle):
+        return _stream(proxy, value)
+    return value
+
+
+def _pack_input_outputs(name, doc):
+    """
+    Method to generate proxy methods which send arguments and results in one
+    serialized message, falling back to rpyc netrefs when they can't be.
+    """
+
+    def _func(self, *args, **kwargs):
+        if self._replica_count and name in self._read_methods:
+            return self._read(lambda proxy: getattr(proxy, name)(*args, **kwargs))
+        if name in self._one_way_methods:
+            return _send_one_way(self, name, args, kwargs)
+        try:
+            payload = _encode_calls(self, [("call", name, args, kwargs)])
+        except Exception:  # args can't be serialized, let rpyc pass netrefs
+            value = getattr(self.obj, name)(*args, **kwargs)
+            return _maybe_unwrap_value(value, type(self))
+        ((success, value),) = _send_calls(self, payload, name)
+        if not success:
+            raise value
+        return _resolve_value(self, value)
+
+    setattr(_func, "__doc__", doc)
+    setattr(_func, "__name__", name)
+    return _RemoteMethod(_func)
+
+
+def _send_one_way(proxy, name, args, kwargs):
+    """ Queue a call on the server without waiting for it to run. """
+    try:
+        payload = _encode_calls(proxy, [("call", name, args, kwargs)])
+    except Exception:  # args can't be serialized, make a normal call
+        getattr(proxy.obj, name)(*args, **kwargs)
+        return
+    if proxy._run_one_way is None:
+        proxy._run_one_way = rpyc.async_(proxy.obj.run_one_way)
+    proxy._run_one_way(payload, proxy._proxy_id, time.time())
+    _CLIENT_METRICS.record(f"{proxy._name}.{name}", bytes_out=len(payload))
+
+
+class _RemoteMethod:
+    """
+    A method of a proxy which runs on the server.
+
+    Calling it waits for the result; calling its nowait attribute queues
+    the call on the server and returns immediately, see SrpoProxy.flush.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, proxy, owner=None):
+        if proxy is None:
+            return self
+        return _BoundRemoteMethod(self.func, proxy)
+
+
+class _BoundRemoteMethod:
+    """ A remote method bound to a proxy. """
+
+    def __init__(self, func, proxy):
+        self._func = func
+        self._proxy = proxy
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self._func(self._proxy, *args, **kwargs)
+
+    def nowait(self, *args, **kwargs):
+        """
+        Queue the call on the server and return None without waiting.
+
+        Calls are run in order by a background thread on the server; errors
+        are raised by the proxy's next call or flush.
+        """
+        _send_one_way(self._proxy, self._func.__name__, args, kwargs)
+
+
 class PassThrough:
     """ Class to pass through simple python interactions to self._obj """
 
@@ -78,6 +343,9 @@ class PassThrough:
     def __iter__(self):
         return iter(self.obj)
 
+    def __contains__(self, item):
+        return item in self.obj
+
     def __len__(self):
         return len(self.obj)
 
@@ -85,12 +353,94 @@ class PassThrough:
         return str(self.obj)
 
 
+class ProxyBatch:
+    """
+    Queue operations on a proxy and send them to the server in one message.
+
+    Each queued operation returns a Future which is resolved, in order, once
+    the batch is submitted. Arguments and results must be picklable.
+
+    Examples
+    --------
+    >>> proxy = transcend({}, "batch_example")  # doctest: +SKIP
+    >>> with proxy.batch() as batch:  # doctest: +SKIP
+    ...     batch["bob"] = 1
+    ...     fut = batch.get("bob")
+    >>> fut.result()  # doctest: +SKIP
+    1
+    """
+
+    def __init__(self, proxy):
+        self._proxy = proxy
+        self._calls = []
+        self.futures = []
+
+    def _queue(self, kind, name=None, args=(), kwargs=None) -> Future:
+        """ Add an operation to the queue and return its future. """
+        self._calls.append((kind, name, args, kwargs or {}))
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+
+        def _call(*args, **kwargs):
+            return self._queue("call", item, args, kwargs)
+
+        return _call
+
+    def __getitem__(self, item) -> Future:
+        return self._queue("getitem", args=(item,))
+
+    def __setitem__(self, item, value):
+        self._queue("setitem", args=(item, value))
+
+    def __delitem__(self, item):
+        self._queue("delitem", args=(item,))
+
+    def get_attr(self, name) -> Future:
+        """ Queue fetching an attribute of the remote object. """
+        return self._queue("getattr", name)
+
+    def set_attr(self, name, value) -> Future:
+        """ Queue setting an attribute of the remote object. """
+        return self._queue("setattr", name, (value,))
+
+    def submit(self):
+        """
+        Send all queued operations to the server and resolve their futures.
+
+        Returns the list of futures for the submitted operations.
+        """
+        calls, futures = self._calls, self.futures
+        self._calls, self.futures = [], []
+        if not calls:
+            return futures
+        payload = _encode_calls(self._proxy, calls)
+        results = _send_calls(self._proxy, payload)
+        for future, (success, value) in zip(futures, results):
+            if success:
+                future.set_result(_resolve_value(self._proxy, value))
+            else:
+                future.set_exception(value)
+        return futures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.submit()
+
+
 class SrpoProxy(PassThrough):
     """
     A poxy object for accessing rpyc service.
     """
 
-    def __init__(self, connection, name):
+    def __init__(self, connection, name, cache_attrs=False, serializer="auto"):
         """
         Get a proxy for a transcendent object.
 
@@ -98,23 +448,76 @@ class SrpoProxy(PassThrough):
         ----------
         connection
             The rpyc connection object to the service.
+        name
+            The name of the transcended object.
+        cache_attrs
+            If True cache attribute values and only fetch them again when
+            the server reports the object may have changed.
+        serializer
+            The preferred serializer for arguments, see srpo.serialize.
         """
         self._connection = connection
         self._name = name
+        self._attr_cache = {} if cache_attrs else None
+        self._serializer = serializer
+        self._options = dict(cache_attrs=cache_attrs, serializer=serializer)
         self.obj = self._connection.root
+        # every attribute lookup on a netref is another round trip, so the
+        # service methods used for each call are looked up once
+        self._run_batch = self.obj.run_batch
+        self._run_batch_async = rpyc.async_(self._run_batch)
+        self._flush_one_way = self.obj.flush_one_way
+        if cache_attrs:
+            self._get_attr_if_changed = self.obj.get_attr_if_changed
         self._proxy_id = (id(self), psutil.Process().pid)
-        self.obj.register_proxy(self._proxy_id)
-        # give instances all methods of object
-        for name, doc in self.obj.methods.items():
-            wrap = _unpack_input_outputs(self, name, doc)
-            setattr(self, name, wrap.__get__(self, type(self)))
+        schema_key, schema = _register_proxy(self.obj, self._proxy_id)
+        self._compression = _negotiate_compression(schema)
+        self._read_methods = frozenset(schema["read_methods"])
+        self._one_way_methods = frozenset(schema["one_way_methods"])
+        self._run_one_way = None
+        # proxies to the read replicas, connected on first use, see _read
+        self._replica_count = schema["replicas"]
+        self._replica_proxies = None
+        self._replica_index = count()
+        # switch to the (cached) class with all methods of the object
+        self.__class__ = _get_proxy_class(schema_key)
 
     def __getattr__(self, item):
-        return _maybe_unwrap_value(getattr(self.obj, item), type(self))
+        cache = self.__dict__.get("_attr_cache")
+        if cache is None:
+            return _maybe_unwrap_value(getattr(self.obj, item), type(self))
+        version = cache[item][0] if item in cache else None
+        codecs = self._compression[2]
+        new_version, payload = self._get_attr_if_changed(item, version, codecs)
+        if payload is None:
+            return cache[item][1]
+        ((success, value),) = load_results(payload)
+        if not success:
+            raise value
+        if isinstance(payload, bytes):  # don't cache netrefs
+            cache[item] = (new_version, value)
+        return value
+
+    def __getitem__(self, item):
+        return self._read(lambda proxy: proxy._call_one("getitem", args=(item,)))
+
+    def __iter__(self):
+        return self._read(lambda proxy: proxy._call_one("iter"))
+
+    def __contains__(self, item):
+        return self._read(lambda proxy: proxy._call_one("contains", args=(item,)))
+
+    def __len__(self):
+        return self._read(lambda proxy: proxy._call_one("len"))
 
     def __del__(self):
+        # the connection belongs to the parent if this process was forked
+        # (there is no id if __init__ failed, eg as the server had gone)
+        proxy_id = self.__dict__.get("_proxy_id")
+        if proxy_id is None or proxy_id[1] != os.getpid():
+            return
         with suppress(Exception):
-            self.obj.deregister_proxy(self._proxy_id)
+            self.obj.deregister_proxy(proxy_id)
 
     def __enter__(self):
         return self
@@ -123,20 +526,427 @@ class SrpoProxy(PassThrough):
         self.close()
 
     def close(self):
+        _PROXY_POOL.discard(self)
         with suppress(Exception):
             self.obj.close(self._proxy_id)
 
+    def _is_healthy(self, address) -> bool:
+        """ Return True if the connection to the server at address is usable. """
+        return not self._connection.closed and psutil.pid_exists(address[-1])
+
+    def _release(self):
+        """ Deregister the proxy and close its connection to the server. """
+        self._drop_replicas()
+        with suppress(Exception):
+            self.obj.deregister_proxy(self._proxy_id)
+        with suppress(Exception):
+            self._connection.close()
+
+    def _read(self, func):
+        """
+        Return func(proxy) using the proxy of the next read replica, if there
+        are any, else this proxy.
+
+        Replicas are replaced when refreshed, so if a replica can't be
+        reached the replicas are looked up again and the server is used.
+        """
+        if not self._replica_count:
+            return func(self)
+        replicas = self._get_replicas()
+        if replicas:
+            replica = replicas[next(self._replica_index) % len(replicas)]
+            try:
+                return func(replica)
+            except (EOFError, ConnectionError):
+                self._drop_replicas()
+        return func(self)
+
+    def _get_replicas(self) -> list:
+        """ Return proxies to the read replicas, connecting if needed. """
+        if self._replica_proxies is None:
+            proxies = []
+            for index, address in enumerate(self.obj.replica_addresses()):
+                name = _replica_name(self._name, index)
+                with suppress(SrpoConnectionError):
+                    connection = _connect_address(name, address)
+                    proxies.append(SrpoProxy(connection, name, **self._options))
+            self._replica_proxies = proxies
+        return self._replica_proxies
+
+    def _drop_replicas(self):
+        """ Close the proxies to the read replicas. """
+        proxies, self._replica_proxies = self._replica_proxies, None
+        for proxy in proxies or ():
+            proxy._release()
+
+    def flush(self):
+        """
+        Wait for the one-way calls queued on the server to run.
+
+        Raises SrpoOneWayError if any of this proxy's one-way calls failed.
+        """
+        out = self._flush_one_way(self._proxy_id, self._compression[2])
+        ((success, value),) = load_results(out)
+        if not success:
+            raise value
+
+    def refresh_replicas(self):
+        """
+        Bring the read replicas up to date with the object.
+
+        Replicas are refreshed in the background after writes, at most once
+        per refresh_interval (see transcend); this refreshes them now so
+        following reads see all previous writes.
+        """
+        self.obj.refresh_replicas()
+        self._drop_replicas()
+
+    def _call_one(self, kind, name=None, args=(), kwargs=None):
+        """ Run one operation on the server through run_batch. """
+        payload = _encode_calls(self, [(kind, name, args, kwargs or {})])
+        ((success, value),) = _send_calls(self, payload, kind)
+        if not success:
+            raise value
+        return _resolve_value(self, value)
+
+    def get_many(self, keys, default=_MISSING) -> list:
+        """
+        Get many items from the remote object in one request.
+
+        The items are read while holding the server's item lock, so no other
+        client can change them part way through.
+
+        Parameters
+        ----------
+        keys
+            The keys to fetch.
+        default
+            If given, return this for missing keys rather than raising a
+            KeyError.
+        """
+        has_default = default is not _MISSING
+        args = (list(keys), has_default, default if has_default else None)
+        return self._read(lambda proxy: proxy._call_one("get_many", args=args))
+
+    def set_many(self, items):
+        """
+        Set many items on the remote object in one request.
+
+        Parameters
+        ----------
+        items
+            A mapping or an iterable of (key, value) pairs.
+        """
+        items = list(items.items() if hasattr(items, "items") else items)
+        self._call_one("set_many", args=(items,))
+
+    def delete_many(self, keys):
+        """
+        Delete many items from the remote object in one request.
+
+        Keys which are not present are ignored.
+
+        Parameters
+        ----------
+        keys
+            The keys to delete.
+        """
+        self._call_one("delete_many", args=(list(keys),))
+
+    def batch(self) -> ProxyBatch:
+        """
+        Return a batch which sends many operations in a single round trip.
+
+        Operations are queued on the batch and executed, in order, when it
+        is submitted (or the context manager exits).
+        """
+        return ProxyBatch(self)
+
+
+# Caches of schemas and generated proxy classes keyed by schema key
+_SCHEMAS = {}
+_PROXY_CLASSES = {}
+
+
+def _register_proxy(service, proxy_id):
+    """ Register a proxy with a service, return its schema key and schema. """
+    # the schema comes back in the same call unless it is already cached
+    schema_key, schema = service.register_proxy(proxy_id, tuple(_SCHEMAS))
+    if schema is not None:
+        _SCHEMAS[schema_key] = loads(schema)
+    return schema_key, _SCHEMAS[schema_key]
+
+
+def _get_proxy_class(schema_key) -> type:
+    """ Return the SrpoProxy subclass for a schema, creating it if needed. """
+    if schema_key not in _PROXY_CLASSES:
+        schema = _SCHEMAS[schema_key]
+        namespace = {
+            name: _pack_input_outputs(name, doc)
+            for name, doc in schema["methods"].items()
+        }
+        type_name = schema["type_name"].rsplit(".", 1)[-1]
+        cls = type(f"SrpoProxy[{type_name}]", (SrpoProxy,), namespace)
+        _PROXY_CLASSES[schema_key] = cls
+    return _PROXY_CLASSES[schema_key]
+
+
+class AsyncSrpoProxy:
+    """
+    An asyncio proxy for accessing an rpyc service.
+
+    Remote methods return awaitables and many requests may be in flight on
+    the same connection at once; replies are handled by a background thread
+    and resolved on the event loop which issued the call. Arguments and
+    results must be picklable.
+    """
+
+    def __init__(self, connection, name, serializer="auto"):
+        self._connection = connection
+        self._name = name
+        self._serializer = serializer
+        self.obj = self._connection.root
+        self._proxy_id = (id(self), psutil.Process().pid)
+        schema_key, schema = _register_proxy(self.obj, self._proxy_id)
+        self._compression = _negotiate_compression(schema)
+        self._run_batch = rpyc.async_(self.obj.run_batch)
+        self._serving_thread = rpyc.BgServingThread(self._connection)
+        for name, doc in schema["methods"].items():
+            setattr(self, name, self._make_method(name, doc))
+
+    def _make_method(self, name, doc):
+        """ Create a coroutine function which calls a remote method. """
+
+        async def _func(*args, **kwargs):
+            value = await self._submit("call", name, args, kwargs)
+            if isinstance(value, _IteratorHandle):
+                return self._stream(value)
+            return value
+
+        setattr(_func, "__doc__", doc)
+        return _func
+
+    def _submit(self, kind, name=None, args=(), kwargs=None) -> "asyncio.Future":
+        """ Send one operation without blocking, return an asyncio future. """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _resolve(async_result):
+            if future.cancelled():
+                return
+            try:
+                ((success, value),) = load_results(async_result.value)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        payload = _encode_calls(self, [(kind, name, args, kwargs or {})])
+        async_result = self._run_batch(payload, self._compression[2], time.time())
+        # callbacks run on the serving thread, hand result back to the loop
+        async_result.add_callback(lambda x: loop.call_soon_threadsafe(_resolve, x))
+        return future
+
+    async def _stream(self, handle):
+        """ Asynchronously yield the items of a server-side iterator. """
+        done = False
+        try:
+            while not done:
+                chunk_size = _STREAM_STATE["chunk_size"]
+                args = (chunk_size,)
+                items, done = await self._submit("next", handle.iterator_id, args)
+                for item in items:
+                    yield item
+        finally:
+            if not done:
+                with suppress(Exception):
+                    await self._submit("close_iter", handle.iterator_id)
+
+    async def _iterate(self):
+        """ Asynchronously yield the items of the remote object. """
+        handle = await self._submit("iter")
+        async for item in self._stream(handle):
+            yield item
+
+    def __aiter__(self):
+        return self._iterate()
+
+    def __getitem__(self, item) -> "asyncio.Future":
+        return self._submit("getitem", args=(item,))
+
+    def get_item(self, item) -> "asyncio.Future":
+        """ Get an item from the remote object. """
+        return self._submit("getitem", args=(item,))
+
+    def set_item(self, item, value) -> "asyncio.Future":
+        """ Set an item on the remote object. """
+        return self._submit("setitem", args=(item, value))
+
+    def del_item(self, item) -> "asyncio.Future":
+        """ Delete an item from the remote object. """
+        return self._submit("delitem", args=(item,))
+
+    def get_attr(self, name) -> "asyncio.Future":
+        """ Get an attribute of the remote object. """
+        return self._submit("getattr", name)
+
+    def set_attr(self, name, value) -> "asyncio.Future":
+        """ Set an attribute of the remote object. """
+        return self._submit("setattr", name, (value,))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
-def _create_srpo_service(object, server_name, registry_path=None):
+    def close(self):
+        """ Deregister the proxy and close the connection. """
+        with suppress(Exception):
+            self.obj.deregister_proxy(self._proxy_id)
+        with suppress(Exception):
+            self._serving_thread.stop()
+        with suppress(Exception):
+            self._connection.close()
+
+
+# operations which don't change the object (so don't bump its version)
+_READ_KINDS = frozenset(
+    {"getattr", "getitem", "get_many", "iter", "next", "close_iter", "len", "contains"}
+)
+# operations run while holding the service's item lock
+_ITEM_KINDS = frozenset(
+    {"getitem", "setitem", "delitem", "get_many", "set_many", "delete_many"}
+)
+
+
+class _WriteBehindQueue:
+    """
+    A bounded queue of one-way operations run, in order, by one thread.
+
+    Errors are kept by the id of the proxy which sent the operation until
+    it asks for them. The number of queued operations from each proxy is
+    tracked so its later calls can wait for them, see wait.
+
+    Parameters
+    ----------
+    service
+        The service whose object the operations run on.
+    maxsize
+        The most operations (messages) to queue before put blocks.
+    """
+
+    def __init__(self, service, maxsize):
+        self.service = service
+        self._queue = queue.Queue(maxsize)
+        self._errors = {}
+        self._pending = {}  # proxy id -> number of queued messages
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._thread = None
+
+    def put(self, payload, proxy_id=None, sent_at=None):
+        """ Queue serialized operations, starting the thread if needed. """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._pending[proxy_id] = self._pending.get(proxy_id, 0) + 1
+        self._queue.put((payload, proxy_id, sent_at))
+
+    def _run(self):
+        """ Run queued operations forever. """
+        service = self.service
+        while True:
+            payload, proxy_id, sent_at = self._queue.get()
+            try:
+                queue_wait = None if sent_at is None else time.time() - sent_at
+                for kind, name, *rest in loads(payload):
+                    start = time.perf_counter()
+                    with service._profiled():
+                        success, value = service._run_call(kind, name, *rest)
+                    service._metrics.record(
+                        name if kind == "call" else kind,
+                        error=not success,
+                        bytes_in=len(payload),
+                        queue_wait=queue_wait,
+                        execution=time.perf_counter() - start,
+                    )
+                    if not success:
+                        self._add_error(proxy_id, value)
+            except Exception as e:  # eg the payload couldn't be loaded
+                self._add_error(proxy_id, e)
+            finally:
+                self._finish(proxy_id)
+                self._queue.task_done()
+
+    def _finish(self, proxy_id):
+        """ Count a message from a proxy as run, waking its waiters. """
+        with self._done:
+            self._pending[proxy_id] -= 1
+            if not self._pending[proxy_id]:
+                del self._pending[proxy_id]
+                self._done.notify_all()
+
+    def _add_error(self, proxy_id, error):
+        """ Keep the error of an operation from a proxy. """
+        with self._lock:
+            self._errors.setdefault(proxy_id, []).append(error)
+
+    def join(self):
+        """ Wait for all queued operations to run. """
+        self._queue.join()
+
+    def wait(self, proxy_id):
+        """ Wait for the queued operations from a proxy to run. """
+        if proxy_id not in self._pending:  # skip the lock for the common case
+            return
+        with self._done:
+            self._done.wait_for(lambda: proxy_id not in self._pending)
+
+    def pop_errors(self, proxy_id) -> list:
+        """ Return, and forget, the errors of a proxy's operations. """
+        if not self._errors:  # skip the lock for the common case
+            return []
+        with self._lock:
+            return self._errors.pop(proxy_id, [])
+
+
+def _create_srpo_service(
+    object,
+    server_name,
+    registry_path=None,
+    serializer="auto",
+    compression=None,
+    compression_threshold=2 ** 16,
+    concurrency=None,
+    read_only=None,
+    replicas=0,
+    reload=None,
+    replica=False,
+    one_way=(),
+    write_behind_size=1000,
+    coalesce=(),
+    memoize=(),
+    memoize_bytes=2 ** 26,
+    memoize_ttl=None,
+):
     """ Create a rpyc service from object. """
     obj_dir = {x: getattr(object, x) for x in dir(object) if not x.startswith("_")}
 
-    class ProxyService(Service, PassThrough):
+    class ProxyService(rpyc.Service, PassThrough):
         _proxies = set()
         _server = None
         obj = object
         name = server_name
         _registry_path = registry_path
+        _serializer = serializer
+        # True if this serves a read replica of another server's object
+        _is_replica = replica
+        _reload = staticmethod(reload)
         # get a dict of method name / docstring
         methods = {
             x: i.__doc__
@@ -144,8 +954,46 @@ def _create_srpo_service(object, server_name, registry_path=None):
             if hasattr(i, "__doc__") and callable(i)
         }
         attrs = set(obj_dir) - set(methods)
+        memoize_methods = get_memoize_methods(object, methods, memoize)
+        # memoized results are only valid while nothing changes obj
+        read_methods = get_read_methods(object, methods, read_only) | memoize_methods
+        coalesce_methods = get_coalesce_methods(object, methods, coalesce)
+        # the schema is sent to proxies in one message and cached by its key
+        _schema = dict(
+            type_name=f"{type(object).__module__}.{type(object).__qualname__}",
+            methods=methods,
+            attrs=sorted(attrs),
+            read_methods=sorted(read_methods),
+            one_way_methods=sorted(one_way),
+            codecs=get_codecs(compression),
+            compression_threshold=compression_threshold,
+            replicas=replicas,
+        )
+        _digest = hashlib.sha1(repr(sorted(_schema.items())).encode()).hexdigest()
+        schema_key = f"{_schema['type_name']}:{_digest}"
 
         def __init__(self):
+            # incremented whenever obj may have changed, see get_attr_if_changed
+            self.version = 0
+            self._version_lock = threading.Lock()
+            # held for item access so bulk operations are atomic
+            self._item_lock = threading.RLock()
+            # iterators being streamed to proxies, by id
+            self._iterators = {}
+            self._iterator_ids = count()
+            self._metrics = Metrics()
+            # the running profile, if any, see start_profile
+            self._profiler = None
+            # decides which operations may run at the same time
+            self._access = AccessControl(concurrency, self.read_methods)
+            # the read replicas of obj, see start_replicas
+            self._replicas = None
+            # runs one-way calls in the background, see run_one_way
+            self._write_behind = _WriteBehindQueue(self, write_behind_size)
+            # shares runs of identical coalescable calls, see run_batch
+            self._single_flight = SingleFlight()
+            # the serialized results of memoized methods, see run_batch
+            self._memo = ResultCache(memoize_bytes, memoize_ttl)
             # wrap all methods with packers/unpackers
             for name, doc in self.methods.items():
                 wrap = _unpack_input_outputs(self, name, doc)
@@ -161,26 +1009,366 @@ def _create_srpo_service(object, server_name, registry_path=None):
             # shutdown the server if no proxies are using it
             pass
 
-        def register_proxy(self, proxy_id):
+        def register_proxy(self, proxy_id, known_keys=()):
+            """
+            Register a proxy, return the schema key and serialized schema.
+
+            The schema is None if its key is in known_keys (the schemas the
+            proxy's process already has), else it would cost a second call.
+            """
             self.__dict__["_proxy_id"] = proxy_id
             self._proxies.add(proxy_id)
+            schema = None if self.schema_key in known_keys else self.proxy_schema()
+            return self.schema_key, schema
+
+        def proxy_schema(self):
+            """ Return the serialized method/attribute schema of obj. """
+            return dumps(self._schema)
 
         def deregister_proxy(self, proxy_id):
             """ Remove a proxy from the registry. """
             with suppress(TypeError, KeyError):
                 self._proxies.remove(proxy_id)
             # if the registry is empty pop the name out of the registry
-            if not self._proxies:
+            if not self._proxies and not self._is_replica:
                 get_registry(self._registry_path).pop(self.name, None)
+                if self._replicas is not None:
+                    self._replicas.stop()
 
         def close(self, proxy_id=None):
             """ Close down the server if one is attached. """
             if self._server:
                 with suppress(RuntimeError):
                     self._server.close()
+                if isinstance(self._server.port, str):  # bound to unix socket
+                    _remove_socket((self._server.port, os.getpid()))
                 # Deregister proxy
                 self.deregister_proxy(proxy_id)
                 get_registry(self._registry_path).pop(self.name, None)
+                if self._replicas is not None:
+                    self._replicas.stop()
+
+        def _bump_version(self):
+            """ Record that obj may have changed. """
+            with self._version_lock:
+                self.version += 1
+            self._memo.clear()
+            if self._replicas is not None:
+                self._replicas.request_refresh()
+
+        def _guard(self, kind, name=None):
+            """ Return a context manager which guards an operation on obj. """
+            access = self._access
+            return access.guard(access.is_read(kind, name, _READ_KINDS))
+
+        def __getattr__(self, item):
+            if "_access" not in self.__dict__:  # still being initialized
+                return getattr(self.obj, item)
+            with self._guard("getattr", item):
+                return getattr(self.obj, item)
+
+        def __getitem__(self, item):
+            with self._guard("getitem"), self._item_lock:
+                return self.obj[item]
+
+        def __len__(self):
+            with self._guard("len"):
+                return len(self.obj)
+
+        def __contains__(self, item):
+            with self._guard("contains"):
+                return item in self.obj
+
+        def __setitem__(self, item, value):
+            with self._guard("setitem"), self._item_lock:
+                self.obj[item] = value
+            self._bump_version()
+
+        def get_attr_if_changed(self, name, version=None, codecs=()):
+            """
+            Return (version, payload) for an attribute of obj.
+
+            The payload is None if the version hasn't changed since the
+            given version, else the serialized (success, value) result.
+            """
+            current = self.version
+            if version == current:
+                return current, None
+            result = self._run_call("getattr", name)
+            return current, self._dump_results([result], codecs)[0]
+
+        def _run_call(self, kind, name, args=(), kwargs=None):
+            """ Run a single operation against obj, return (success, value). """
+            with self._guard(kind, name):
+                try:
+                    value = self._run_unguarded(kind, name, args, kwargs)
+                except Exception as e:
+                    return False, e
+                finally:
+                    # bump after the operation so readers never cache stale values
+                    if not self._access.is_read(kind, name, _READ_KINDS):
+                        self._bump_version()
+                if isinstance(value, GeneratorType):
+                    value = self._add_iterator(value)
+                return True, value
+
+        def _run_unguarded(self, kind, name, args=(), kwargs=None):
+            """ Run a single operation against obj, return its value. """
+            if kind == "call":
+                return getattr(self.obj, name)(*args, **(kwargs or {}))
+            elif kind == "getattr":
+                return getattr(self.obj, name)
+            elif kind == "setattr":
+                return setattr(self.obj, name, args[0])
+            elif kind in _ITEM_KINDS:
+                with self._item_lock:
+                    return self._run_item_call(kind, *args)
+            elif kind == "iter":
+                return self._add_iterator(iter(self.obj))
+            elif kind == "len":
+                return len(self.obj)
+            elif kind == "contains":
+                return args[0] in self.obj
+            elif kind == "next":
+                return self._next_chunk(name, *args)
+            elif kind == "close_iter":
+                self._iterators.pop(name, None)
+                return None
+            raise ValueError(f"unknown operation {kind}")
+
+        def _run_item_call(self, kind, *args):
+            """ Run an item (or bulk item) operation on obj. """
+            if kind == "getitem":
+                return self.obj[args[0]]
+            elif kind == "setitem":
+                return self.obj.__setitem__(*args)
+            elif kind == "delitem":
+                return self.obj.__delitem__(args[0])
+            elif kind == "get_many":
+                keys, has_default, default = args
+                if not has_default:
+                    return [self.obj[x] for x in keys]
+                return [self.obj[x] if x in self.obj else default for x in keys]
+            elif kind == "set_many":
+                for key, value in args[0]:
+                    self.obj[key] = value
+            elif kind == "delete_many":
+                for key in args[0]:
+                    if key in self.obj:
+                        del self.obj[key]
+
+        def _add_iterator(self, iterator) -> _IteratorHandle:
+            """ Keep an iterator to stream to a proxy, return its handle. """
+            iterator_id = next(self._iterator_ids)
+            self._iterators[iterator_id] = iterator
+            return _IteratorHandle(iterator_id)
+
+        def _next_chunk(self, iterator_id, chunk_size):
+            """ Return (items, done) with the next items of an iterator. """
+            iterator = self._iterators[iterator_id]
+            try:
+                items = list(islice(iterator, chunk_size))
+            except BaseException:
+                self._iterators.pop(iterator_id, None)
+                raise
+            done = len(items) < chunk_size
+            if done:
+                self._iterators.pop(iterator_id, None)
+            return items, done
+
+        def _dump_results(self, results, codecs=()):
+            """
+            Serialize results, compressing with the first accepted codec.
+
+            Returns (out, shared), shared being True if out holds shared
+            memory segments (checked before compressing, as it is cheap).
+            """
+            out = dump_results(results, self._serializer)
+            shared = uses_shared_memory(out)
+            if isinstance(out, bytes) and codecs:
+                out = compress(out, codecs[0], self._schema["compression_threshold"])
+            return out, shared
+
+        def run_batch(self, payload, codecs=(), sent_at=None, proxy_id=None):
+            """
+            Run a serialized sequence of operations, return the results.
+
+            Results may be compressed with the first of the codecs the proxy
+            accepts. sent_at is the (epoch) time the proxy sent the request,
+            used to measure how long it waited to be run. One-way calls
+            queued by proxy_id are run first; if any failed the operations
+            aren't run and fail with a SrpoOneWayError.
+            """
+            queue_wait = None if sent_at is None else time.time() - sent_at
+            calls = loads(payload)
+            self._write_behind.wait(proxy_id)
+            errors = self._write_behind.pop_errors(proxy_id)
+            if errors:
+                error = SrpoOneWayError(errors)
+                return self._dump_results([(False, error)] * len(calls), codecs)[0]
+            args = (payload, calls, codecs, queue_wait)
+            single = len(calls) == 1 and calls[0][0] == "call"
+            name = calls[0][1] if single else None
+            if name in self.memoize_methods:
+                return self._run_memoized(name, args)
+            return self._run_shared(name, args)[0]
+
+        def _run_memoized(self, name, args):
+            """ Return the cached reply to a call from run_batch, else run it. """
+            payload, calls, codecs, queue_wait = args
+            key = make_key(*calls[0][1:], extra=tuple(codecs))
+            if key is None:  # unhashable arguments
+                return self._run_shared(name, args)[0]
+            start = time.perf_counter()
+            out = self._memo.get(key)
+            if out is not None:
+                self._record_shared(name, args, out, memoized=start)
+                return out
+            generation = self._memo.generation
+            out, results, shared = self._run_shared(name, args)
+            # shared memory segments are unlinked by the first reader
+            if isinstance(out, bytes) and not shared and _cacheable(results):
+                self._memo.put(key, out, generation)
+            return out
+
+        def _run_shared(self, name, args):
+            """
+            Run operations from run_batch, sharing the run with identical
+            concurrent requests if name is a coalescable method.
+
+            Returns (out, results, shared) as _run_calls.
+            """
+            if name not in self.coalesce_methods:
+                return self._run_calls(*args)
+            # equal requests get equal payloads, so share one run and its reply
+            payload, _, codecs, _ = args
+            start = time.perf_counter()
+            key = (payload, tuple(codecs))
+            (out, results, shared), coalesced = self._single_flight.run(
+                key, lambda: self._run_calls(*args)
+            )
+            if not coalesced:
+                return out, results, shared
+            if not _shareable(results):
+                return self._run_calls(*args)
+            if shared:  # segments are unlinked by the first reader
+                out, shared = self._dump_results(results, codecs)
+            self._record_shared(name, args, out, coalesced=start)
+            return out, results, shared
+
+        def _record_shared(self, name, args, out, **starts):
+            """ Record a call answered with another call's reply. """
+            payload, _, _, queue_wait = args
+            now = time.perf_counter()
+            self._metrics.record(
+                name,
+                bytes_in=len(payload),
+                bytes_out=len(out) if isinstance(out, bytes) else 0,
+                queue_wait=queue_wait,
+                **{kind: now - start for kind, start in starts.items()},
+            )
+
+        def _run_calls(self, payload, calls, codecs, queue_wait):
+            """
+            Run deserialized operations from run_batch and record their stats.
+
+            Returns (out, results, shared), the serialized and raw results
+            and whether out holds shared memory segments.
+            """
+            results, timings = [], []
+            for call in calls:
+                start = time.perf_counter()
+                with self._profiled():
+                    results.append(self._run_call(*call))
+                timings.append(time.perf_counter() - start)
+            out, shared = self._dump_results(results, codecs)
+            # payload sizes are shared evenly between the operations
+            bytes_out = len(out) if isinstance(out, bytes) else 0
+            for (kind, name, *_), (success, _), execution in zip(
+                calls, results, timings
+            ):
+                self._metrics.record(
+                    name if kind == "call" else kind,
+                    error=not success,
+                    bytes_in=len(payload) // len(calls),
+                    bytes_out=bytes_out // len(calls),
+                    queue_wait=queue_wait,
+                    execution=execution,
+                )
+            return out, results, shared
+
+        def start_replicas(self, count, options):
+            """ Fork count read replicas of obj, see _ReplicaSet. """
+            self._replicas = _ReplicaSet(self, count, options)
+            self._replicas.refresh()
+
+        def replica_addresses(self):
+            """ Return the registry addresses of the read replicas. """
+            replicas = self._replicas
+            return () if replicas is None else replicas.addresses
+
+        def refresh_replicas(self):
+            """ Bring the read replicas up to date with obj. """
+            if self._replicas is not None:
+                self._replicas.refresh()
+
+        def reload_replica(self):
+            """ Run the reload hook on the object of a read replica. """
+            with self._guard("reload"):
+                self._reload(self.obj)
+            self._bump_version()
+
+        def run_one_way(self, payload, proxy_id=None, sent_at=None):
+            """
+            Queue serialized operations to run in the background.
+
+            Blocks while the queue is full.
+            """
+            self._write_behind.put(payload, proxy_id, sent_at)
+
+        def flush_one_way(self, proxy_id=None, codecs=()):
+            """
+            Wait for all queued one-way operations to run.
+
+            Return the serialized result, which fails with a SrpoOneWayError
+            if any from proxy_id failed.
+            """
+            self._write_behind.join()
+            errors = self._write_behind.pop_errors(proxy_id)
+            result = (False, SrpoOneWayError(errors)) if errors else (True, None)
+            return self._dump_results([result], codecs)[0]
+
+        def metrics(self):
+            """ Return the serialized per-method metrics of the server. """
+            return dumps(self._metrics.snapshot())
+
+        def memo_stats(self):
+            """ Return the serialized stats of the memoized results cache. """
+            return dumps(self._memo.stats())
+
+        def reset_metrics(self):
+            """ Forget the metrics recorded so far. """
+            self._metrics.reset()
+
+        def _profiled(self):
+            """ Return a context manager which profiles a request if needed. """
+            profiler = self._profiler
+            return nullcontext() if profiler is None else profiler.profiled()
+
+        def start_profile(self, mode="cprofile", interval=0.005):
+            """ Start profiling the server, see srpo.profiling.Profiler. """
+            if self._profiler is not None:
+                raise RuntimeError(f"{self.name} is already being profiled")
+            profiler = profiling.Profiler(mode, interval)
+            profiler.start()
+            self._profiler = profiler
+
+        def stop_profile(self) -> bytes:
+            """ Stop profiling the server, return the profile. """
+            profiler, self._profiler = self._profiler, None
+            if profiler is None:
+                raise RuntimeError(f"{self.name} is not being profiled")
+            return profiler.stop()
 
         @property
         def public_methods(self):
@@ -199,6 +1387,21 @@ def transcend(
     remote: bool = True,
     registry_path: Optional[str] = None,
     daemon=True,
+    unix_socket: Optional[bool] = None,
+    serializer: str = "auto",
+    compression: Optional[str] = None,
+    compression_threshold: int = 2 ** 16,
+    concurrency: Optional[str] = None,
+    read_only: Optional[Union[Sequence[str], Callable[[str], bool]]] = None,
+    replicas: int = 0,
+    reload: Optional[Callable[[Any], Any]] = None,
+    refresh_interval: Optional[float] = 1.0,
+    one_way: Sequence[str] = (),
+    write_behind_size: int = 1000,
+    coalesce: Sequence[str] = (),
+    memoize: Sequence[str] = (),
+    memoize_bytes: int = 2 ** 26,
+    memoize_ttl: Optional[float] = None,
 ) -> SrpoProxy:
     """
     Transcend an object to its own process.
@@ -215,7 +1418,7 @@ def transcend(
         The number of threads to allow for the server pool. If one is used
         everything is executed synchronously.
     port
-        The port to bind to.
+        The port to bind to. Only used when not binding to a unix socket.
     remote
         If True run the server on a remote process. Typically only set to
         False for debugging.
@@ -224,6 +1427,75 @@ def transcend(
     daemon
         If True start the transcended server in a daemon process. Only has an
         effect when remote == True.
+    unix_socket
+        If True bind the server to a unix domain socket rather than a TCP port
+        on localhost. By default unix sockets are used on linux unless a port
+        is specified.
+    serializer
+        The serializer the server prefers for results: "auto" (chosen per
+        value), "pickle", "msgpack" or "cloudpickle"; see srpo.serialize.
+    compression
+        If not None compress messages (in both directions) of at least
+        compression_threshold bytes. "auto" uses the best codec available
+        to both the server and proxy (zstd, lz4 or zlib), else the name of
+        one codec.
+    compression_threshold
+        The minimum message size, in bytes, to compress.
+    concurrency
+        How operations may overlap. None runs them one at a time if
+        server_threads is 1, else without any locking; "serial" runs one at
+        a time, and "rw" lets read-only operations run together while
+        mutating ones run alone. Getting attributes, items and
+        iterating are reads; setting them is a write, as are methods unless
+        marked read-only.
+    read_only
+        The names of read-only methods, or a callable which takes a method
+        name and returns True if it is read-only. Methods can also be marked
+        with the srpo.read_only and srpo.mutating decorators.
+    replicas
+        The number of read replicas to fork from the server. Proxies send
+        calls of read-only methods, item reads, and iteration to the
+        replicas in turn and everything else to the server. Replicas are
+        refreshed in the background after writes, so reads may be stale
+        for up to about refresh_interval; use proxy.refresh_replicas() to
+        wait for them. Unless given, concurrency is "serial" so replicas
+        are consistent copies.
+    reload
+        If given, replicas are refreshed by calling reload with their copy
+        of the object (eg to re-read an index from disk) rather than by
+        forking new replicas from the server.
+    refresh_interval
+        The minimum seconds between background refreshes of the replicas;
+        all writes in between share one refresh. Without reload a refresh
+        forks every replica while holding the write lock, which blocks
+        writes for a few milliseconds per replica (more for large objects)
+        and doubles the memory touched by later writes until the old
+        replicas exit. If None replicas are only refreshed by
+        proxy.refresh_replicas().
+    one_way
+        The names of methods which proxies call without waiting for them
+        to run, as if with proxy.method.nowait(...); see SrpoProxy.flush.
+        A proxy's later calls wait for its queued one-way calls to run.
+    write_behind_size
+        The number of one-way calls the server queues before callers are
+        made to wait.
+    coalesce
+        The names of methods whose identical concurrent calls share one run
+        and its result, eg an expensive read many clients make at once.
+        Methods can also be marked with the srpo.coalesce decorator. Only
+        calls made while another is running are coalesced; nothing is
+        cached (see memoize).
+    memoize
+        The names of methods whose results the server caches, serialized,
+        by their (hashable) arguments until the object is changed by a
+        method which isn't read-only or by setting an item or attribute.
+        Methods can also be marked with the srpo.memoize decorator, and
+        memoized methods are read-only. See the server's memo_stats.
+    memoize_bytes
+        The total size of the memoized results to keep; the least recently
+        used are dropped first.
+    memoize_ttl
+        If not None the seconds after which memoized results expire.
     """
     # Get the registry path. This does need to be here to preserve any changes
     # in path for when a new process starts.
@@ -232,60 +1504,905 @@ def transcend(
     # If the object has already been transcended just return it
     if name in server_registry:
         try:
-            return get_proxy(name)
+            return get_proxy(name, registry_path=registry_path)
         # If it fails remove it and start over
         except SrpoConnectionError:
-            terminate(name)
+            terminate(name, registry_path=registry_path)
             time.sleep(0.2)
+    options = _server_options(
+        registry_path,
+        server_threads=server_threads,
+        port=port,
+        unix_socket=unix_socket,
+        serializer=serializer,
+        compression=compression,
+        compression_threshold=compression_threshold,
+        concurrency=concurrency,
+        read_only=read_only,
+        replicas=replicas,
+        reload=reload,
+        refresh_interval=refresh_interval,
+        one_way=one_way,
+        write_behind_size=write_behind_size,
+        coalesce=coalesce,
+        memoize=memoize,
+        memoize_bytes=memoize_bytes,
+        memoize_ttl=memoize_ttl,
+    )
+    if not remote:  # this blocks until the server is closed
+        _serve(obj, name, options)
+        return
+    server_registry[name] = _start_server(obj, name, options, daemon)
+    return get_proxy(name, registry_path=registry_path)
 
-    def _remote():
-        """ Code to execute on forked process. """
-        service = _create_srpo_service(obj, name, registry_path=registry_path)
-        # set new process group
 
-        protocol = dict(allow_all_attrs=True)
+def _server_options(
+    registry_path,
+    server_threads=1,
+    port=0,
+    unix_socket=None,
+    serializer="auto",
+    compression=None,
+    compression_threshold=2 ** 16,
+    concurrency=None,
+    read_only=None,
+    replicas=0,
+    reload=None,
+    refresh_interval=1.0,
+    one_way=(),
+    write_behind_size=1000,
+    coalesce=(),
+    memoize=(),
+    memoize_bytes=2 ** 26,
+    memoize_ttl=None,
+) -> dict:
+    """ Check and return the options of a server, see transcend. """
+    get_codecs(compression)  # raise early for unknown codecs
+    if concurrency not in CONCURRENCY_MODES:
+        raise ValueError(f"unknown concurrency mode {concurrency}")
+    if unix_socket is None:
+        unix_socket = _USE_UNIX_SOCKET and not port
+    # background work (one-way calls, forking replicas) must not overlap
+    # requests which would otherwise run one at a time
+    if concurrency is None and (replicas or server_threads == 1):
+        concurrency = "serial"
+    return dict(
+        registry_path=registry_path,
+        server_threads=server_threads,
+        port=port,
+        unix_socket=unix_socket,
+        serializer=serializer,
+        compression=compression,
+        compression_threshold=compression_threshold,
+        concurrency=concurrency,
+        read_only=read_only,
+        replicas=replicas,
+        reload=reload,
+        refresh_interval=refresh_interval,
+        one_way=tuple(one_way),
+        write_behind_size=write_behind_size,
+        coalesce=tuple(coalesce),
+        memoize=tuple(memoize),
+        memoize_bytes=memoize_bytes,
+        memoize_ttl=memoize_ttl,
+    )
+
+
+def _start_server(obj, name, options, daemon=True):
+    """ Start a process serving obj, return its registry address. """
+    # hand the object to a pre-spawned server if possible, else fork
+    address = None
+    if daemon and _WARM_POOL is not None:
+        address = _WARM_POOL.transcend(obj, name, options)
+    if address is None:
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        args = (obj, name, options, writer)
+        proc = multiprocessing.Process(target=_serve, args=args, daemon=daemon)
+        # this is a dirty hack to let the process live after script exists
+        proc.__del__ = lambda: None
+        proc.join = lambda *args, **kwargs: None
+        # start process
+        proc.start()
+        writer.close()
+        address = _wait_for_address(reader, name)
+    return address
+
+
+class _EpollPoll:
+    """
+    A poll object for rpyc's ThreadPoolServer using epoll.
+
+    The server registers a connection for polling once a worker finds no
+    more requests on it. With select.poll a connection registered while
+    the polling thread waits isn't seen until the wait times out (0.1 s),
+    stalling the next request on it; epoll sees it straight away.
+    """
 
-        kwargs = dict(
-            hostname="localhost",
-            nbThreads=server_threads,
-            protocol_config=protocol,
-            port=port,
+    def __init__(self):
+        self._epoll = select.epoll()  # linux only
+        self._flags = {"r": select.EPOLLIN | select.EPOLLPRI, "w": select.EPOLLOUT}
+        self._masks = (
+            (select.EPOLLIN | select.EPOLLPRI, "r"),
+            (select.EPOLLOUT, "w"),
+            (select.EPOLLERR, "e"),
+            (select.EPOLLHUP | select.EPOLLRDHUP, "h"),
         )
 
-        server = ThreadPoolServer(service(), **kwargs)
-        sql_kwargs = dict(
-            filename=server_registry.filename,
-            tablename=server_registry.tablename,
-            flag="c",
+    def register(self, fd, mode):
+        flags = select.EPOLLERR | select.EPOLLHUP | select.EPOLLRDHUP
+        for char in mode:
+            flags |= self._flags.get(char, 0)
+        try:
+            self._epoll.register(fd, flags)
+        except FileExistsError:
+            self._epoll.modify(fd, flags)
+
+    def unregister(self, fd):
+        try:
+            self._epoll.unregister(fd)
+        except (OSError, ValueError):  # rpyc expects a KeyError
+            raise KeyError(fd)
+
+    def poll(self, timeout=None):
+        out = []
+        for fd, event in self._epoll.poll(-1 if timeout is None else timeout):
+            out.append((fd, "".join(c for flag, c in self._masks if event & flag)))
+        return out
+
+
+def _serve(obj, name, options, ready=None):
+    """
+    Run a server for obj, blocks until the server is closed.
+
+    Once the server is listening its address is sent through ready, if
+    provided, else it is written to the registry directly.
+    """
+    registry_path = options["registry_path"]
+    try:
+        service = _create_srpo_service(
+            obj,
+            name,
+            registry_path=registry_path,
+            serializer=options["serializer"],
+            compression=options["compression"],
+            compression_threshold=options["compression_threshold"],
+            concurrency=options["concurrency"],
+            read_only=options["read_only"],
+            replicas=options.get("replicas", 0),
+            reload=options.get("reload"),
+            replica=options.get("replica", False),
+            one_way=options.get("one_way", ()),
+            write_behind_size=options.get("write_behind_size", 1000),
+            coalesce=options.get("coalesce", ()),
+            memoize=options.get("memoize", ()),
+            memoize_bytes=options.get("memoize_bytes", 2 ** 26),
+            memoize_ttl=options.get("memoize_ttl"),
         )
-        # register new server
-        registery = SqliteDict(**sql_kwargs)
-        registery[name] = (server.host, server.port, os.getpid())
-        registery.commit()
-        # get a new new view of registry, make sure name is there
-        assert name in SqliteDict(**sql_kwargs)
+        protocol = dict(allow_all_attrs=True)
+        kwargs = dict(nbThreads=options["server_threads"], protocol_config=protocol)
+        if options["unix_socket"]:
+            kwargs["socket_path"] = _get_socket_path()
+        else:
+            kwargs.update(hostname="localhost", port=options["port"])
+        instance = service()
+        server = rpyc.utils.server.ThreadPoolServer(instance, **kwargs)
+        if hasattr(select, "epoll"):
+            server.poll_object = _EpollPoll()
+        server._listen()  # bind and listen before reporting the address
+        if options["unix_socket"]:
+            address = (server.port, os.getpid())
+        else:
+            address = (server.host, server.port, os.getpid())
         service._server = server
+        if options.get("replicas"):
+            instance.start_replicas(options["replicas"], options)
+    except Exception as e:
+        if ready is not None:
+            ready.send(e)
+        raise
+    if ready is None:
+        get_registry(registry_path)[name] = address
+    else:
+        ready.send(address)
+        ready.close()
+    try:
         server.start()
+    finally:
+        # results which were never read, eg as their proxy disconnected
+        remove_segments()
 
-    if remote:  # launch other process to run server
-        proc = multiprocessing.Process(target=_remote, daemon=daemon)
-        # this is a dirty hack to let the process live after script exists
-        proc.__del__ = lambda: None
-        proc.join = lambda *args, **kwargs: None
-        # start process
-        proc.start()
-        # give the server a bit of time to start before releasing control
-        for _ in range(100):
-            if name in server_registry:
-                return get_proxy(name)
-            time.sleep(0.1)
-    else:
-        _remote()
 
-    # the name should be in the remote server now
+def _wait_for_address(reader, name):
+    """ Wait for a starting server to send its address, raise if it fails. """
+    try:
+        if not reader.poll(_STARTUP_TIMEOUT):
+            raise TimeoutError(f"no response after {_STARTUP_TIMEOUT} seconds")
+        address = reader.recv()
+    except (EOFError, OSError) as e:
+        address = e
+    finally:
+        reader.close()
+    if isinstance(address, BaseException):
+        msg = f"failed to start server for {name}"
+        raise SrpoConnectionError(msg + f"\n server traceback: \n{address}")
+    return address
+
+
+# --- Read replicas
+
+
+def _replica_name(name, index) -> str:
+    """ Return the registry name of a read replica. """
+    return f"{name}/replica/{index}"
+
+
+def _close_inherited(server):
+    """ Close, without shutting down, the sockets a fork got from server. """
+    with suppress(Exception):
+        server.listener.close()
+    for connection in list(server.fd_to_conn.values()):
+        with suppress(Exception):
+            connection._channel.stream.sock.close()
+
+
+def _exit_with_parent():
+    """ Exit the (forked) process once its parent has exited. """
+    parent = os.getppid()
+
+    def _watch():
+        while os.getppid() == parent:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=_watch, daemon=True).start()
+
+
+def _fork_replica(obj, name, options, server) -> tuple:
+    """ Fork a process serving obj, return (pid, reader of its address). """
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    pid = os.fork()
+    if pid == 0:  # in the replica
+        try:
+            reader.close()
+            _close_inherited(server)
+            _exit_with_parent()
+            _serve(obj, name, options, ready=writer)
+        finally:
+            os._exit(0)
+    writer.close()
+    return pid, reader
+
+
+def _stop_server(address):
+    """ Stop (and reap, if a child) a server process. """
+    with suppress(psutil.NoSuchProcess, psutil.AccessDenied):
+        process = psutil.Process(address[-1])
+        process.terminate()
+        with suppress(psutil.TimeoutExpired):
+            process.wait(timeout=5)
+    _remove_socket(address)
+
+
+class _ReplicaSet:
+    """
+    The read replicas of a server's object.
+
+    Replicas are forked from the server so they start with a copy of its
+    object. They are refreshed, after writes (at most once per refresh
+    interval) or on request, by forking new replicas (then stopping the old
+    ones) or, if a reload hook was given, by running it on each replica's
+    object.
+
+    Parameters
+    ----------
+    service
+        The service of the server.
+    count
+        The number of replicas.
+    options
+        The options of the server, see transcend.
+    """
+
+    def __init__(self, service, count, options):
+        self.service = service
+        self.count = count
+        self.options = dict(options, replicas=0, replica=True)
+        self.addresses = ()
+        self.interval = options.get("refresh_interval", 1.0)
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._last_refresh = time.monotonic()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def _registry(self):
+        """ Return the registry the replicas are registered in. """
+        return get_registry(self.options["registry_path"])
+
+    def _fork_all(self) -> tuple:
+        """ Fork all replicas, return their addresses. """
+        service, names = self.service, []
+        # hold the write lock so replicas don't copy a half changed object
+        with service._guard("fork"):
+            for index in range(self.count):
+                name = _replica_name(service.name, index)
+                obj, server = service.obj, service._server
+                names.append((name, _fork_replica(obj, name, self.options, server)))
+        addresses = []
+        for name, (pid, reader) in names:
+            try:
+                addresses.append(_wait_for_address(reader, name))
+            except SrpoConnectionError:
+                with suppress(psutil.NoSuchProcess):
+                    psutil.Process(pid).terminate()
+        return tuple(addresses)
+
+    def refresh(self):
+        """ Bring the replicas up to date with the server's object. """
+        with self._lock:
+            if self._stopped:
+                return
+            if self.addresses and self.service._reload is not None:
+                for address in self.addresses:
+                    with suppress(Exception):
+                        connection = _connect_address(self.service.name, address)
+                        try:
+                            connection.root.reload_replica()
+                        finally:
+                            connection.close()
+                self._last_refresh = time.monotonic()
+                return
+            old, self.addresses = self.addresses, self._fork_all()
+            registry = self._registry()
+            for index, address in enumerate(self.addresses):
+                registry[_replica_name(self.service.name, index)] = address
+            for address in old:
+                _stop_server(address)
+            self._last_refresh = time.monotonic()
+
+    def request_refresh(self):
+        """ Refresh the replicas in the background; requests coalesce. """
+        if self.interval is not None:
+            self._pending.set()
+
+    def _refresh_loop(self):
+        """ Refresh when requested, at most once per refresh interval. """
+        while not self._stopped:
+            self._pending.wait()
+            # requests made until the interval is up share the refresh
+            delay = self._last_refresh + (self.interval or 0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._pending.clear()
+            with suppress(Exception):
+                self.refresh()
+
+    def stop(self):
+        """ Stop the replicas and remove them from the registry. """
+        with self._lock:
+            self._stopped = True
+            addresses, self.addresses = self.addresses, ()
+        self._pending.set()  # wake the refresh thread so it exits
+        registry = self._registry()
+        for index, address in enumerate(addresses):
+            registry.pop(_replica_name(self.service.name, index), None)
+            _stop_server(address)
+
+
+# --- Sharded objects
+
+
+class ShardedAddress(NamedTuple):
+    """ The registry entry of an object transcended in shards. """
+
+    shards: tuple
+    keyed_methods: tuple
+
+
+def _shard_name(name, index) -> str:
+    """ Return the name of a shard of a sharded object. """
+    return f"{name}/shard/{index}"
+
+
+def _key_bytes(key) -> bytes:
+    """
+    Return bytes identifying a key, the same in every process.
+
+    Equal numbers (eg 1, 1.0 and True) give the same bytes, as they are the
+    same dict key. Raises TypeError for other types of keys, whose pickles
+    (eg of sets, ordered by hash) may differ between processes.
+    """
+    if isinstance(key, str):
+        return b"s" + key.encode("utf8", "surrogatepass")
+    if isinstance(key, bytes):
+        return b"b" + key
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        return b"i%d" % key
+    if isinstance(key, float):
+        return b"f" + key.hex().encode()
+    if key is None:
+        return b"n"
+    if isinstance(key, (tuple, frozenset)):
+        parts = [_key_bytes(x) for x in key]
+        if isinstance(key, frozenset):  # iteration order depends on hashes
+            parts = sorted(parts)
+        tag = b"t" if isinstance(key, tuple) else b"z"
+        return tag + b"".join(len(x).to_bytes(4, "little") + x for x in parts)
+    raise TypeError(f"can't shard keys of type {type(key).__name__}")
+
+
+def shard_index(key, shards: int) -> int:
+    """
+    Return the index of the shard which holds a key.
+
+    Parameters
+    ----------
+    key
+        The key; str, bytes, int, float, None, or tuples or frozensets of
+        them. Other keys raise a TypeError as they may not hash the same way
+        in every process.
+    shards
+        The number of shards.
+    """
+    return zlib.crc32(_key_bytes(key)) % shards
+
+
+class ShardedProxy:
+    """
+    A proxy for an object transcended in shards, see transcend_sharded.
+
+    Items, and calls of the keyed methods (whose first argument is a key),
+    go to the shard the key hashes to. Length, iteration and bulk item
+    access (including update) are sent to all shards at once. Other methods
+    are called, with the same arguments, on every shard and return a list
+    of the result from each.
+    """
+
+    def __init__(
+        self,
+        name,
+        address: ShardedAddress,
+        registry_path=None,
+        cache_attrs=False,
+        serializer="auto",
+    ):
+        self._name = name
+        self._registry_path = registry_path
+        self._keyed_methods = frozenset(address.keyed_methods)
+        self.shards = []
+        try:
+            for index, shard_address in enumerate(address.shards):
+                shard_name = _shard_name(name, index)
+                connection = _connect_address(shard_name, shard_address)
+                kwargs = dict(cache_attrs=cache_attrs, serializer=serializer)
+                self.shards.append(SrpoProxy(connection, shard_name, **kwargs))
+        except Exception:
+            self._release()
+            raise
+
+    def _shard(self, key) -> SrpoProxy:
+        """ Return the proxy of the shard which holds key. """
+        return self.shards[shard_index(key, len(self.shards))]
+
+    def _group(self, keys) -> dict:
+        """ Return {shard index: [positions of its keys]}. """
+        out = {}
+        for position, key in enumerate(keys):
+            out.setdefault(shard_index(key, len(self.shards)), []).append(position)
+        return out
+
+    def _fan_out(self, calls) -> list:
+        """
+        Send (shard, operation) pairs without waiting for each reply, return
+        the values of the operations in order.
+        """
+        pending = []
+        for shard, call in calls:
+            payload = _encode_calls(shard, [call])
+            args = (payload, shard._compression[2], time.time(), shard._proxy_id)
+            result = shard._run_batch_async(*args)
+            pending.append((shard, result))
+        out = []
+        for shard, result in pending:
+            ((success, value),) = load_results(result.value)
+            if not success:
+                raise value
+            out.append(_resolve_value(shard, value))
+        return out
+
+    def _on_all(self, kind, name=None, args=(), kwargs=None) -> list:
+        """ Run an operation on every shard, return the values. """
+        call = (kind, name, args, kwargs or {})
+        return self._fan_out([(x, call) for x in self.shards])
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        if item in self._keyed_methods:
+
+            def _keyed(key, *args, **kwargs):
+                return getattr(self._shard(key), item)(key, *args, **kwargs)
+
+            return _keyed
+
+        def _all(*args, **kwargs):
+            return self._on_all("call", item, args, kwargs)
+
+        return _all
+
+    def __getitem__(self, key):
+        return self._shard(key)[key]
+
+    def __setitem__(self, key, value):
+        self._shard(key)[key] = value
+
+    def __delitem__(self, key):
+        self._shard(key)._call_one("delitem", args=(key,))
+
+    def __contains__(self, key):
+        return key in self._shard(key)
+
+    def __len__(self):
+        return sum(self._on_all("len"))
+
+    def __iter__(self):
+        return chain.from_iterable(self._on_all("iter"))
+
+    def _bulk(self, kind, keys, make_args) -> tuple:
+        """
+        Run a bulk operation on the shards holding keys, return the groups
+        of key positions and the value from each shard.
+
+        make_args is called with the positions of each shard's keys.
+        """
+        groups = self._group(keys)
+        calls = [
+            (self.shards[index], (kind, None, make_args(positions), {}))
+            for index, positions in groups.items()
+        ]
+        return groups.values(), self._fan_out(calls)
+
+    def get_many(self, keys, default=_MISSING) -> list:
+        """ Get many items, from all shards at once, see SrpoProxy.get_many. """
+        keys = list(keys)
+        has_default = default is not _MISSING
+        default = default if has_default else None
+
+        def _args(positions):
+            return [keys[x] for x in positions], has_default, default
+
+        out = [None] * len(keys)
+        for positions, values in zip(*self._bulk("get_many", keys, _args)):
+            for position, value in zip(positions, values):
+                out[position] = value
+        return out
+
+    def set_many(self, items):
+        """ Set many items, on all shards at once, see SrpoProxy.set_many. """
+        items = list(items.items() if hasattr(items, "items") else items)
+        keys = [key for key, _ in items]
+        self._bulk("set_many", keys, lambda x: ([items[i] for i in x],))
+
+    def update(self, other=(), **kwargs):
+        """ Update items, as dict.update, by sending each to its shard. """
+        if hasattr(other, "keys"):
+            items = [(key, other[key]) for key in other.keys()]
+        else:
+            items = list(other)
+        self.set_many(items + list(kwargs.items()))
+
+    def delete_many(self, keys):
+        """ Delete many items, on all shards at once, see SrpoProxy.delete_many. """
+        keys = list(keys)
+        self._bulk("delete_many", keys, lambda x: ([keys[i] for i in x],))
+
+    def flush(self):
+        """ Wait for one-way calls queued on the shards, see SrpoProxy.flush. """
+        for proxy in self.shards:
+            proxy.flush()
+
+    def _is_healthy(self, address) -> bool:
+        """ Return True if the connections to all shards are usable. """
+        pairs = zip(self.shards, address.shards)
+        return all(proxy._is_healthy(x) for proxy, x in pairs)
+
+    def _release(self):
+        """ Close the connections to the shards. """
+        for proxy in self.shards:
+            proxy._release()
+
+    def close(self):
+        """ Shut down all the shards. """
+        _PROXY_POOL.discard(self)
+        for proxy in self.shards:
+            proxy.close()
+        get_registry(self._registry_path).pop(self._name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def transcend_sharded(
+    factory: Callable[[], Any],
+    name: str,
+    shards: int = 2,
+    keyed_methods: Sequence[str] = ("get", "pop", "setdefault"),
+    registry_path: Optional[str] = None,
+    daemon: bool = True,
+    **kwargs,
+) -> ShardedProxy:
+    """
+    Transcend an object split into shards, each in its own process.
+
+    Keys are spread over the shards by hash, so each shard only holds (and
+    serves) its part of the items. All shards are registered under name.
+
+    Parameters
+    ----------
+    factory
+        A callable which returns the (empty) object of one shard, eg dict.
+    name
+        A string identifier so other processes can find the object.
+    shards
+        The number of shards (and processes).
+    keyed_methods
+        The methods whose first argument is a key, which are sent to the
+        shard of that key rather than every shard.
+    registry_path
+        The path to the simple sqlitedict used to register IPs and ports.
+    daemon
+        If True start the shard servers in daemon processes.
+    **kwargs
+        Other options of the shard servers, see transcend; port isn't
+        supported.
+    """
+    registry_path = registry_path or get_current_registry_path()
     server_registry = get_registry(registry_path)
-    assert name in server_registry
-    return get_proxy(name)
+    if name in server_registry:
+        try:
+            return get_proxy(name, registry_path=registry_path)
+        except SrpoConnectionError:
+            terminate(name, registry_path=registry_path)
+    options = _server_options(registry_path, **kwargs)
+    addresses = []
+    try:
+        for index in range(shards):
+            obj, shard_name = factory(), _shard_name(name, index)
+            addresses.append(_start_server(obj, shard_name, options, daemon))
+    except Exception:
+        for address in addresses:
+            _stop_server(address)
+        raise
+    server_registry[name] = ShardedAddress(tuple(addresses), tuple(keyed_methods))
+    return get_proxy(name, registry_path=registry_path)
+
+
+# --- Warm server pool
+
+
+def _warm_worker(pipe):
+    """ Wait, in a pre-spawned process, for an object to serve. """
+    try:
+        payload = pipe.recv_bytes()
+    except (EOFError, OSError, KeyboardInterrupt):  # pool was shut down
+        return
+    try:
+        obj, name, options = pickle.loads(payload)
+    except Exception:  # eg its class was defined after the pool started
+        pipe.send(None)
+        return
+    _serve(obj, name, options, ready=pipe)
+
+
+def _warm_spawner(requests, pool_end):
+    """
+    Fork idle warm pool processes on request, sending their pipes back.
+
+    This runs in a process of its own, forked when the pool starts, so the
+    forks happen neither on the caller's time nor from a thread (a fork
+    from a thread can inherit locks other threads held, and hang).
+    """
+    # else the idle processes would keep the pool's end open, and so the
+    # pipes still waiting to be received there (and themselves) alive
+    pool_end.close()
+    # import (and configure) rpyc once, before forking the idle processes
+    rpyc.utils.server
+    # the idle processes become servers, let them be reaped when they exit
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while True:
+        try:
+            count = requests.recv()
+        except (EOFError, OSError, KeyboardInterrupt):  # pool was closed
+            return
+        for _ in range(count):
+            parent_end, child_end = multiprocessing.Pipe()
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                requests.close()
+                parent_end.close()
+                code = 0
+                try:
+                    _warm_worker(child_end)
+                except BaseException:
+                    code = 1
+                finally:
+                    os._exit(code)
+            child_end.close()
+            requests.send(pid)
+            multiprocessing.reduction.send_handle(requests, parent_end.fileno(), None)
+            parent_end.close()
+
+
+class _WarmServerPool:
+    """
+    A pool of idle, pre-spawned processes which objects can be handed to.
+
+    Objects must be picklable to use the pool; others are forked as usual.
+    The idle processes are forked by a spawner process so refilling the
+    pool after a hand-off costs the caller a single pipe write.
+
+    Parameters
+    ----------
+    size
+        The number of idle processes to keep.
+    max_age
+        If not None, idle processes older than this (in seconds) are
+        replaced rather than used.
+    """
+
+    def __init__(self, size: int, max_age: Optional[float] = None):
+        self.size = size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._workers = []  # (pid, pipe, start_time)
+        self._requested = 0  # processes asked for but not yet received
+        self._requests, spawner_end = multiprocessing.Pipe()
+        args = (spawner_end, self._requests)
+        kwargs = dict(target=_warm_spawner, args=args, daemon=True)
+        self._spawner = multiprocessing.Process(**kwargs)
+        self._spawner.start()
+        spawner_end.close()
+        self.fill()
+
+    def fill(self):
+        """ Ask the spawner for enough processes to fill the pool. """
+        with self._lock:
+            self._receive()
+            missing = self.size - len(self._workers) - self._requested
+            if missing > 0:
+                with suppress(OSError):  # the spawner was stopped
+                    self._requests.send(missing)
+                    self._requested += missing
+
+    def _receive(self, timeout=0):
+        """ Add the processes the spawner has started to the pool. """
+        while self._requested and self._requests.poll(timeout):
+            try:
+                pid = self._requests.recv()
+                fd = multiprocessing.reduction.recv_handle(self._requests)
+            except (EOFError, OSError):
+                self._requested = 0
+                return
+            pipe = multiprocessing.connection.Connection(fd)
+            self._workers.append((pid, pipe, time.monotonic()))
+            self._requested -= 1
+
+    def wait(self, timeout: float = _STARTUP_TIMEOUT) -> bool:
+        """ Wait for the requested processes, return True if the pool is full. """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._requested and time.monotonic() < deadline:
+                self._receive(max(deadline - time.monotonic(), 0))
+            return len(self._workers) >= self.size
+
+    def _take(self):
+        """ Return an idle (pid, pipe), recycling stale ones, or None. """
+        with self._lock:
+            self._receive()
+            while self._workers:
+                pid, pipe, start = self._workers.pop(0)
+                too_old = self.max_age is not None and (
+                    time.monotonic() - start > self.max_age
+                )
+                # idle processes never write, so a readable pipe means it died
+                if not pipe.poll() and not too_old:
+                    return pid, pipe
+                _stop_worker(pid, pipe)
+        return None
+
+    def transcend(self, obj, name, options):
+        """
+        Hand obj to an idle process and return the server's address.
+
+        Returns None if the object can't be sent or no process is idle.
+        """
+        try:
+            payload = pickle.dumps((obj, name, options))
+        except Exception:
+            return None
+        worker = self._take()
+        if worker is None:
+            self.fill()
+            return None
+        pid, pipe = worker
+        try:
+            pipe.send_bytes(payload)
+        except OSError:  # the process died while idle
+            _stop_worker(pid, pipe)
+            return None
+        address = _wait_for_address(pipe, name)
+        # only a request, the spawner forks the replacement
+        self.fill()
+        return address
+
+    def close(self):
+        """ Stop the spawner and all idle processes. """
+        with self._lock:
+            workers, self._workers = self._workers, []
+            with suppress(Exception):
+                self._requests.close()
+        with suppress(Exception):
+            self._spawner.terminate()
+        for pid, pipe, _ in workers:
+            _stop_worker(pid, pipe)
+
+
+def _stop_worker(pid, pipe):
+    """ Stop an idle warm pool process. """
+    with suppress(Exception):
+        pipe.close()
+    with suppress(OSError):
+        os.kill(pid, signal.SIGTERM)
+
+
+_WARM_POOL = None
+
+
+def _forget_warm_pool():
+    """ Forked children don't own the parent's warm pool. """
+    global _WARM_POOL
+    _WARM_POOL = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_warm_pool)
+
+
+def start_warm_pool(size: int = 2, max_age: Optional[float] = None):
+    """
+    Start a pool of pre-spawned server processes used by transcend.
+
+    Picklable objects transcended (with daemon=True) while the pool is
+    running are sent to an idle process rather than forking a new one.
+    The pool is refilled after each use by a spawner process, so callers
+    don't wait for the replacement to fork.
+
+    Parameters
+    ----------
+    size
+        The number of idle processes to keep ready.
+    max_age
+        If not None, idle processes older than this many seconds are
+        recycled instead of used.
+    """
+    global _WARM_POOL
+    stop_warm_pool()
+    _WARM_POOL = _WarmServerPool(size, max_age=max_age)
+
+
+def stop_warm_pool():
+    """ Stop the idle processes of the warm pool, if one is running. """
+    global _WARM_POOL
+    pool, _WARM_POOL = _WARM_POOL, None
+    if pool is not None:
+        pool.close()
 
 
 def terminate(name: str, registry_path: Optional[Path] = None) -> None:
@@ -299,22 +2416,31 @@ def terminate(name: str, registry_path: Optional[Path] = None) -> None:
     registry_path
         The path to the simple sqlitedict used to register IPs and ports.
     """
+    registry_path = registry_path or get_current_registry_path()
     server_registry = get_registry(registry_path)
-    registry_path = registry_path or server_registry.filename
     if name not in server_registry:
         return
+    prefix = _replica_name(name, "")
+    for key in [x for x in server_registry if x.startswith(prefix)]:
+        terminate(key, registry_path=registry_path)
     # be nice and tell the process to shutdown
     with suppress(Exception):
-        get_proxy(name).shutdown()
+        get_proxy(name, registry_path=registry_path, pooled=False).shutdown()
         time.sleep(0.01)
-    # get process id and kill process
-    pid = server_registry[name][-1]
-    with suppress((psutil.NoSuchProcess, psutil.AccessDenied)):
-        psutil.Process(pid).terminate()
+    _PROXY_POOL.discard_name(name, registry_path)
+    # get process ids and kill processes
+    address = server_registry[name]
+    shards = address.shards if isinstance(address, ShardedAddress) else (address,)
+    for server_address in shards:
+        with suppress((psutil.NoSuchProcess, psutil.AccessDenied)):
+            psutil.Process(server_address[-1]).terminate()
+        _remove_socket(server_address)
+        remove_segments(server_address[-1])
     # remove name from registry and unlink if empty
     server_registry.pop(name, None)
     if not server_registry:
-        Path(registry_path).unlink()
+        with suppress(OSError):  # eg another process has just registered
+            server_registry.unlink()
 
 
 def terminate_all(registry_path: Optional[Path] = None):
@@ -324,52 +2450,348 @@ def terminate_all(registry_path: Optional[Path] = None):
         terminate(key, registry_path=registry_path)
 
 
-def get_proxy(name: str, registry_path: Optional[str] = None) -> SrpoProxy:
+# --- Per-process proxy pool
+
+_POOL_STATE = dict(
+    # the maximum number of proxies kept open by each process
+    max_size=64,
+    # seconds after a proxy was last handed out before the pool forgets it
+    idle_timeout=300.0,
+)
+
+
+class _ProxyPool:
+    """
+    A per-process cache of proxies keyed by (registry_path, name, options).
+
+    Proxies are only reused while their connection is open, the registry
+    still points to the same server, and the server process is alive.
+
+    Proxies are handed out (eg by transcend) and may still be in use, so
+    evicting one only drops the pool's reference; its connection is closed
+    once nothing else holds it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proxies = OrderedDict()  # key -> (address, proxy, last_used)
+        self._inherited = []  # proxies of the parent process, see reset
+
+    def get(self, key, address) -> Optional[SrpoProxy]:
+        """ Return a healthy proxy for key, or None. """
+        with self._lock:
+            self._evict_idle()
+            entry = self._proxies.pop(key, None)
+        if entry is None:
+            return None
+        old_address, proxy, _ = entry
+        if old_address != address or not proxy._is_healthy(address):
+            proxy._release()
+            return None
+        with self._lock:
+            self._proxies[key] = (address, proxy, time.monotonic())
+        return proxy
+
+    def put(self, key, address, proxy):
+        """ Add a proxy to the pool, evicting the least recently used. """
+        with self._lock:
+            self._proxies.pop(key, None)
+            self._proxies[key] = (address, proxy, time.monotonic())
+            while len(self._proxies) > max(_POOL_STATE["max_size"], 0):
+                self._proxies.popitem(last=False)
+
+    def discard(self, proxy):
+        """ Remove a proxy from the pool (eg because it was closed). """
+        with self._lock:
+            for key, (_, pooled, _) in list(self._proxies.items()):
+                if pooled is proxy:
+                    self._proxies.pop(key)
+
+    def discard_name(self, name, registry_path):
+        """ Remove and release any proxy for name. """
+        base_key = _pool_key(name, registry_path)
+        with self._lock:
+            keys = [x for x in self._proxies if x[:2] == base_key]
+            entries = [self._proxies.pop(x) for x in keys]
+        for _, proxy, _ in entries:
+            proxy._release()
+
+    def _evict_idle(self):
+        """ Forget proxies not handed out for longer than idle_timeout. """
+        cutoff = time.monotonic() - _POOL_STATE["idle_timeout"]
+        for key, (_, _, last_used) in list(self._proxies.items()):
+            if last_used < cutoff:
+                self._proxies.pop(key)
+
+    def clear(self):
+        """ Release all pooled proxies. """
+        with self._lock:
+            proxies, self._proxies = self._proxies, OrderedDict()
+        for _, proxy, _ in proxies.values():
+            proxy._release()
+
+    def reset(self):
+        """
+        Forget all proxies without touching their (inherited) connections.
+
+        The proxies are kept alive since collecting them would send messages
+        (eg to delete their netrefs) over the parent's connections.
+        """
+        self._lock = threading.Lock()
+        self._inherited.extend(self._proxies.values())
+        self._proxies = OrderedDict()
+
+
+_PROXY_POOL = _ProxyPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_PROXY_POOL.reset)
+
+
+def _pool_key(name, registry_path):
+    """ Return the key used to pool proxies. """
+    return str(registry_path or get_current_registry_path()), name
+
+
+def set_proxy_pool_options(
+    max_size: Optional[int] = None, idle_timeout: Optional[float] = None
+):
+    """
+    Configure the per-process pool used by get_proxy.
+
+    Parameters
+    ----------
+    max_size
+        The maximum number of proxies to keep; least recently used proxies
+        are dropped first. Use 0 to effectively disable pooling.
+    idle_timeout
+        The number of seconds after which a proxy which hasn't been handed
+        out is dropped.
+
+    Dropped proxies are only closed once nothing else holds them, so
+    proxies in use are never closed by the pool.
+    """
+    if max_size is not None:
+        _POOL_STATE["max_size"] = max_size
+    if idle_timeout is not None:
+        _POOL_STATE["idle_timeout"] = idle_timeout
+
+
+# --- Lazily connected proxies
+
+
+class LazySrpoProxy:
+    """
+    A proxy which only connects to its object when first used.
+
+    The registry isn't read, and no connection made or proxy registered
+    with the server, until an attribute, item, or method of the object is
+    used; then get_proxy is called and everything is passed to its proxy.
+    """
+
+    def __init__(self, name, **kwargs):
+        self._name = name
+        self._kwargs = kwargs
+        self._proxy = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """ Return the real proxy, getting it the first time. """
+        proxy = self._proxy
+        if proxy is None:
+            with self._lock:
+                if self._proxy is None:
+                    self._proxy = get_proxy(self._name, **self._kwargs)
+                proxy = self._proxy
+        return proxy
+
+    @property
+    def connected(self) -> bool:
+        """ True once the proxy has connected to the object. """
+        return self._proxy is not None
+
+    def __getattr__(self, item):
+        # don't connect for protocols probed by copy, pickle, etc.
+        if item.startswith("__"):
+            raise AttributeError(item)
+        return getattr(self._connect(), item)
+
+    def __getitem__(self, item):
+        return self._connect()[item]
+
+    def __setitem__(self, item, value):
+        self._connect()[item] = value
+
+    def __iter__(self):
+        return iter(self._connect())
+
+    def __contains__(self, item):
+        return item in self._connect()
+
+    def __len__(self):
+        return len(self._connect())
+
+    def __str__(self):
+        return str(self._connect())
+
+    def __repr__(self):
+        state = "connected" if self.connected else "not connected"
+        return f"<{type(self).__name__} {self._name!r} ({state})>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """ Shut down the object's server, see SrpoProxy.close. """
+        self._connect().close()
+
+    def _release(self):
+        """ Release the real proxy if it was ever connected. """
+        if self._proxy is not None:
+            self._proxy._release()
+
+
+def get_proxy(
+    name: str,
+    registry_path: Optional[str] = None,
+    pooled: bool = True,
+    cache_attrs: bool = False,
+    serializer: str = "auto",
+    lazy: bool = False,
+) -> SrpoProxy:
     """
     Get a proxy for a transcendent object.
 
+    A ShardedProxy is returned for objects transcended with
+    transcend_sharded.
+
     Parameters
     ----------
     name
         The name of the transcended object.
     registry_path
         The path to the simple sqlitedict used to register IPs and ports.
+    pooled
+        If True reuse a healthy proxy from this process' pool, if one
+        exists, and add new proxies to the pool.
+    cache_attrs
+        If True the proxy caches attribute values. The server keeps a
+        version which changes when items or attributes are set or methods
+        are called, so cached values are checked with a cheap version
+        comparison rather than fetched. Changes made to the object by its
+        own threads are not detected.
+    serializer
+        The serializer the proxy prefers for arguments: "auto" (chosen per
+        value), "pickle", "msgpack" or "cloudpickle"; see srpo.serialize.
+    lazy
+        If True return a LazySrpoProxy, which doesn't look up or connect to
+        the object until it is first used. Useful in processes which may
+        never use the object.
     """
     # if another proxy was passed we just need to peel the name off this one.
-    if isinstance(name, SrpoProxy):
+    if isinstance(name, (SrpoProxy, ShardedProxy, LazySrpoProxy)):
         name = name._name
+    if lazy:
+        kwargs = dict(cache_attrs=cache_attrs, serializer=serializer)
+        return LazySrpoProxy(name, registry_path=registry_path, pooled=pooled, **kwargs)
+    address = _lookup_address(name, registry_path)
+    key = _pool_key(name, registry_path) + (cache_attrs, serializer)
+    if pooled and _POOL_STATE["max_size"] > 0:
+        proxy = _PROXY_POOL.get(key, address)
+        if proxy is not None:
+            return proxy
+    kwargs = dict(cache_attrs=cache_attrs, serializer=serializer)
+    if isinstance(address, ShardedAddress):
+        proxy = ShardedProxy(name, address, registry_path=registry_path, **kwargs)
+    else:
+        connection = _connect_address(name, address)
+        proxy = SrpoProxy(connection, name=name, **kwargs)
+    if pooled and _POOL_STATE["max_size"] > 0:
+        _PROXY_POOL.put(key, address, proxy)
+    return proxy
+
+
+def get_async_proxy(
+    name: str, registry_path: Optional[str] = None, serializer: str = "auto"
+) -> AsyncSrpoProxy:
+    """
+    Get an asyncio proxy for a transcendent object.
 
+    Parameters
+    ----------
+    name
+        The name of the transcended object.
+    registry_path
+        The path to the simple sqlitedict used to register IPs and ports.
+    serializer
+        The serializer the proxy prefers for arguments, see get_proxy.
+    """
+    if isinstance(name, (SrpoProxy, AsyncSrpoProxy)):
+        name = name._name
+    connection = _connect(name, registry_path)
+    return AsyncSrpoProxy(connection, name=name, serializer=serializer)
+
+
+def _connect(name: str, registry_path: Optional[str] = None):
+    """ Look up a name in the registry and return an rpyc connection to it. """
+    return _connect_address(name, _lookup_address(name, registry_path))
+
+
+def _lookup_address(name: str, registry_path: Optional[str] = None):
+    """ Return the registry address of name or raise. """
     server_registry = get_registry(registry_path)
     if name not in server_registry:
         msg = f"could not find server associated with {name}"
         raise SrpoConnectionError(msg)
-    host, port, _ = server_registry[name]
-    # try to connect, register this end of proxy, return proxy
+    return server_registry[name]
+
+
+def _connect_address(name: str, address):
+    """ Return an rpyc connection to the server at a registry address. """
+    if isinstance(address, ShardedAddress):
+        raise SrpoConnectionError(f"{name} is sharded, use get_proxy")
     try:
-        connection = rpyc.connect(host, port)
+        if len(address) == 2:  # (socket_path, pid)
+            connection = rpyc.utils.factory.unix_connect(address[0])
+        else:  # (host, port, pid)
+            connection = rpyc.connect(*address[:2])
     except Exception as e:
         msg = f"could not connect to server associated with {name}"
         raise SrpoConnectionError(msg + f"\n server traceback: \n{e}")
+    return connection
 
-    return SrpoProxy(connection, name=name)
 
+def _get_socket_path() -> str:
+    """ Return a new path for binding a unix domain socket. """
+    name = f"srpo_{os.getpid()}_{uuid.uuid4().hex[:8]}.sock"
+    return str(Path(tempfile.gettempdir()) / name)
 
-def get_registry(registry_path: Optional[Union[str, Path]] = None) -> SqliteDict:
+
+def _remove_socket(address):
+    """ Remove the socket file (if any) of a registry address. """
+    if len(address) == 2:
+        with suppress(OSError):
+            Path(address[0]).unlink()
+
+
+def get_registry(registry_path: Optional[Union[str, Path]] = None) -> MutableMapping:
     """
-    Get the sqlite backed registry (key value pair).
+    Get the registry (key value pair) of transcended objects.
+
+    The registry is cached for each process and only re-read from disk when
+    another process changes it.
 
     Parameters
     ----------
     registry_path
-        Either "server" or "proxy"
-
-    Returns
-    -------
-
+        The path to the registry, if None use the current registry path.
+        Paths like "dir://<path>" or "shm://<name>" use a directory or
+        shared memory backend rather than sqlite, see srpo.registry.
     """
     path = registry_path or get_current_registry_path()
-    kwargs = dict(autocommit=True, tablename="server")
-    return SqliteDict(path, **kwargs)
+    return open_registry(path)
 
 
 def get_current_registry_path():
@@ -386,7 +2808,8 @@ def set_registry_path(new_path):
     Parameters
     ----------
     new_path
-        The new path to use.
+        The new path to use; this also selects the backend, see
+        get_registry.
     """
 
     class _RegistryManager:
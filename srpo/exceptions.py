@@ -5,3 +5,14 @@ Exceptions for srpo
 
 class SrpoConnectionError(ValueError):
     """ Raised when a problem with communicating with the server occurs. """
+
+
+class SrpoOneWayError(RuntimeError):
+    """ Raised when one-way (nowait) calls failed on the server. """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return f"{len(self.errors)} one-way call(s) failed: {self.errors!r}"
@@ -0,0 +1,65 @@
+"""
+Deferred imports, so importing srpo doesn't pay for modules it may not use.
+
+Short lived processes (eg workers which only look up a proxy, or the srpo
+CLI) shouldn't have to import rpyc, psutil and friends before they need
+them.
+"""
+import importlib
+import importlib.util
+import threading
+from typing import Callable, Optional
+
+
+class LazyModule:
+    """
+    Stands in for a module which is imported on first attribute access.
+
+    Parameters
+    ----------
+    name
+        The name of the module.
+    on_import
+        If given, called with the module once it is imported (before any
+        attribute is returned), eg to configure it.
+    """
+
+    def __init__(self, name: str, on_import: Optional[Callable] = None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+        self._lock = threading.RLock()
+
+    def _load(self):
+        """ Import (and configure) the module if needed, return it. """
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_import is not None:
+                        self._on_import(module)
+                    self._module = module
+                module = self._module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __repr__(self):
+        state = "imported" if self._module is not None else "not imported"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str, on_import: Optional[Callable] = None):
+    """
+    Return a LazyModule for name, or None if it isn't installed.
+
+    Finding a module is much cheaper than importing it, so this suits
+    optional dependencies which are checked for at import time.
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    return None if spec is None else LazyModule(name, on_import)
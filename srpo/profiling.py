@@ -0,0 +1,133 @@
+"""
+On-demand profiling of a running server.
+
+Two modes are supported:
+
+    cprofile - deterministic profiling of the requests the server runs. The
+        result is a marshaled pstats table which can be written to a file
+        and read with pstats.Stats.
+    sample - a thread which periodically records the stack of every other
+        thread. The result is in the collapsed stack format ("a;b;c count"
+        per line) used by flamegraph tools.
+
+When no profile is running the only cost is checking a flag per request.
+"""
+import cProfile
+import marshal
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# from python 3.12 cProfile uses sys.monitoring, which sees every thread
+_PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _collapse(frame) -> str:
+    """ Return the collapsed (root first, ; separated) stack of a frame. """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    """
+    A profile session which can be started and stopped from any thread.
+
+    Parameters
+    ----------
+    mode
+        "cprofile" or "sample".
+    interval
+        The seconds between stack samples in sample mode.
+    """
+
+    def __init__(self, mode: str = "cprofile", interval: float = 0.005):
+        if mode not in {"cprofile", "sample"}:
+            raise ValueError(f"unknown profile mode {mode}")
+        self.mode = mode
+        self.interval = interval
+        # guards the profilers and counts the requests being profiled
+        self._active = 0
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        # cprofile: one profiler per thread (or one for all threads)
+        self._local = threading.local()
+        self._profilers = []
+        # sample: collapsed stack -> count
+        self._stacks = Counter()
+        self._sampler = None
+
+    def start(self):
+        """ Start profiling. """
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        elif _PROFILE_ALL_THREADS:
+            profiler = cProfile.Profile()
+            self._profilers.append(profiler)
+            profiler.enable()
+
+    def _sample(self):
+        """ Record the stacks of all other threads until stopped. """
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._stacks[_collapse(frame)] += 1
+
+    @contextmanager
+    def profiled(self):
+        """ Profile the enclosed code in the current thread (cprofile mode). """
+        if self.mode != "cprofile" or _PROFILE_ALL_THREADS:
+            yield
+            return
+        profiler = getattr(self._local, "profiler", None)
+        with self._condition:
+            if self._stopped.is_set():
+                profiler = None
+            elif profiler is None:
+                profiler = self._local.profiler = cProfile.Profile()
+                self._profilers.append(profiler)
+            self._active += profiler is not None
+        if profiler is None:
+            yield
+            return
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def stop(self) -> bytes:
+        """
+        Stop profiling, return the results.
+
+        In cprofile mode this is a marshaled pstats table (the format of
+        pstats.Stats.dump_stats), in sample mode the collapsed stacks.
+        """
+        with self._condition:
+            self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            lines = (f"{stack} {count}" for stack, count in self._stacks.items())
+            return "\n".join(lines).encode()
+        # wait for requests which are still being profiled
+        with self._condition:
+            self._condition.wait_for(lambda: not self._active)
+            profilers = list(self._profilers)
+        for profiler in profilers:
+            profiler.disable()
+        if not profilers:
+            return marshal.dumps({})
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return marshal.dumps(stats.stats)
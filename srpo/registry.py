@@ -0,0 +1,323 @@
+"""
+The registry which maps names of transcended objects to server addresses.
+
+Several backends are available, chosen by the form of the registry path:
+
+    sqlite - a plain path, eg "~/.srpo_registry.sqlite". A single sqlite
+        file, readable by sqlitedict.
+    directory - "dir://<path>". One file per name in a directory, written
+        to a temporary file and atomically renamed, so readers never lock
+        and writers only contend on the names they write.
+    shared memory - "shm://<name>". A directory backend in /dev/shm (where
+        available) so the files never touch disk.
+
+Each backend has the same mapping interface; others can be added with
+register_backend.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import uuid
+from collections.abc import MutableMapping
+from contextlib import suppress
+from pathlib import Path
+from typing import Callable, Union
+from urllib.parse import quote, unquote
+
+from srpo.lazy import LazyModule
+
+# only sqlitedict's (pickle based) value encoding is used
+sqlitedict = LazyModule("sqlitedict")
+
+
+class SqliteRegistry(MutableMapping):
+    """
+    A sqlite backed registry which keeps its contents in memory.
+
+    The table layout is the same as sqlitedict's so either can read the
+    other. The in-memory copy is only reloaded when another connection has
+    changed the database (as reported by sqlite's data_version pragma) or
+    the file has been replaced.
+
+    Parameters
+    ----------
+    path
+        The path to the sqlite file.
+    """
+
+    tablename = "server"
+
+    def __init__(self, path: Union[str, Path]):
+        self.filename = str(path)
+        self._lock = threading.RLock()
+        self._connection = None
+        self._inode = None
+        self._version = None
+        self._data = {}
+
+    def _connect(self):
+        """ Open a new connection to the database, creating it if needed. """
+        self.close()
+        con = sqlite3.connect(
+            self.filename, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        table = self.tablename
+        con.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT PRIMARY KEY, value BLOB)'
+        )
+        self._connection = con
+        self._inode = os.stat(self.filename).st_ino
+        self._version = None
+
+    def _refresh(self):
+        """ Reload the in-memory copy if the database has changed. """
+        try:
+            inode = os.stat(self.filename).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self._connection is None or inode != self._inode:
+            self._connect()
+        # the open connection keeps the old inode alive, so a replaced file
+        # always has a new inode
+        (version,) = self._connection.execute("PRAGMA data_version").fetchone()
+        if version != self._version:
+            query = f'SELECT key, value FROM "{self.tablename}" ORDER BY rowid'
+            rows = self._connection.execute(query).fetchall()
+            self._data = {key: sqlitedict.decode(value) for key, value in rows}
+            self._version = version
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._refresh()
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._refresh()
+            query = f'REPLACE INTO "{self.tablename}" (key, value) VALUES (?,?)'
+            self._connection.execute(query, (key, sqlitedict.encode(value)))
+            self._data[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._refresh()
+            if key not in self._data:
+                raise KeyError(key)
+            query = f'DELETE FROM "{self.tablename}" WHERE key = ?'
+            self._connection.execute(query, (key,))
+            del self._data[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            self._refresh()
+            return key in self._data
+
+    def __iter__(self):
+        with self._lock:
+            self._refresh()
+            return iter(list(self._data))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.filename!r})"
+
+    def commit(self):
+        """ Changes are committed immediately, kept for sqlitedict parity. """
+
+    def close(self):
+        """ Close the connection to the database. """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+
+    def unlink(self):
+        """ Remove the registry's file, eg once it is empty. """
+        self.close()
+        Path(self.filename).unlink()
+
+
+class DirectoryRegistry(MutableMapping):
+    """
+    A registry which stores each name in its own file in a directory.
+
+    Values are written to a temporary file which is then renamed over the
+    name's file, so a reader sees either the old or new value and no locks
+    are needed. Values are cached by the identity (inode, size and mtime)
+    of their file, so a lookup of an unchanged name is a single stat.
+
+    Parameters
+    ----------
+    path
+        The path to the directory, created if needed.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.filename = str(path)
+        self._cache = {}  # name -> (file identity, value)
+
+    def _path(self, key) -> str:
+        """ Return the path of the file for a name. """
+        # names may contain "/", and files starting with "." are temporary
+        name = quote(key, safe="")
+        if name.startswith("."):
+            name = "%2E" + name[1:]
+        return os.path.join(self.filename, name)
+
+    def __getitem__(self, key):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._cache.pop(key, None)
+            raise KeyError(key) from None
+        identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        try:
+            with open(path, "rb") as fi:
+                value = pickle.load(fi)
+        except FileNotFoundError:  # removed since the stat
+            raise KeyError(key) from None
+        self._cache[key] = (identity, value)
+        return value
+
+    def __setitem__(self, key, value):
+        os.makedirs(self.filename, exist_ok=True)
+        temp = os.path.join(self.filename, f".{os.getpid()}-{uuid.uuid4().hex}")
+        try:
+            with open(temp, "wb") as fi:
+                pickle.dump(value, fi)
+            os.replace(temp, self._path(key))
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temp)
+            raise
+
+    def __delitem__(self, key):
+        self._cache.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __iter__(self):
+        try:
+            names = sorted(os.listdir(self.filename))
+        except FileNotFoundError:
+            names = []
+        return iter([unquote(x) for x in names if not x.startswith(".")])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.filename!r})"
+
+    def commit(self):
+        """ Changes are written immediately, kept for sqlitedict parity. """
+
+    def close(self):
+        """ Forget the cached values. """
+        self._cache.clear()
+
+    def unlink(self):
+        """ Remove the registry's directory if it is empty. """
+        self.close()
+        os.rmdir(self.filename)
+
+
+def _shared_memory_dir() -> str:
+    """ Return the directory for shared memory registries. """
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) else tempfile.gettempdir()
+
+
+class SharedMemoryRegistry(DirectoryRegistry):
+    """
+    A DirectoryRegistry kept in shared memory (/dev/shm).
+
+    Where /dev/shm doesn't exist (eg macOS) the temporary directory is
+    used instead.
+
+    Parameters
+    ----------
+    name
+        The name of the registry, used for its directory.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(os.path.join(_shared_memory_dir(), name))
+
+
+# registry path scheme -> the backend's constructor, see open_registry
+_BACKENDS = dict(
+    sqlite=SqliteRegistry,
+    dir=DirectoryRegistry,
+    shm=SharedMemoryRegistry,
+)
+
+
+def register_backend(scheme: str, factory: Callable[[str], MutableMapping]):
+    """
+    Register a registry backend for paths like "{scheme}://{location}".
+
+    Parameters
+    ----------
+    scheme
+        The prefix of registry paths which use the backend.
+    factory
+        A callable which takes the location (the rest of the path) and
+        returns a MutableMapping, with close and unlink methods.
+    """
+    _BACKENDS[scheme] = factory
+
+
+def _create_registry(path: str) -> MutableMapping:
+    """ Create the registry for a path, see the module docstring. """
+    scheme, sep, location = path.partition("://")
+    if sep and scheme in _BACKENDS:
+        return _BACKENDS[scheme](location)
+    return SqliteRegistry(path)
+
+
+_REGISTRY_CACHE = {}
+_REGISTRY_CACHE_LOCK = threading.Lock()
+
+
+def _reset_registry_cache():
+    """ Drop cached registries; sqlite connections can't cross a fork. """
+    global _REGISTRY_CACHE_LOCK
+    _REGISTRY_CACHE_LOCK = threading.Lock()
+    _REGISTRY_CACHE.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_registry_cache)
+
+
+def open_registry(path: Union[str, Path]) -> MutableMapping:
+    """
+    Return the (per-process) cached registry for a path.
+
+    Parameters
+    ----------
+    path
+        The path to the registry file, or "{scheme}://{location}" for other
+        backends (see the module docstring).
+    """
+    key = str(path)
+    with _REGISTRY_CACHE_LOCK:
+        if key not in _REGISTRY_CACHE:
+            _REGISTRY_CACHE[key] = _create_registry(key)
+        return _REGISTRY_CACHE[key]
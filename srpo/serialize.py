@@ -0,0 +1,459 @@
+"""
+Serialization of values sent between proxies and servers.
+
+Several serializers are supported, each marks its payloads with a one byte
+tag so the receiver can decode them without knowing how they were chosen:
+
+    pickle - protocol 5. Large out-of-band buffers (objects which pickle
+        a PickleBuffer, eg numpy arrays; bytes and bytearray are pickled
+        in-band) are written to shared memory and mapped, rather than
+        copied, by the receiving process.
+    msgpack - fast encoding of plain data (requires msgpack).
+    cloudpickle - for closures, lambdas and locally defined classes
+        (requires cloudpickle).
+
+With the "auto" preference, a serializer registered for the type of the
+value is tried first, then msgpack, pickle and cloudpickle.
+
+Payloads above a size threshold can also be compressed with zlib, or lz4 or
+zstd when they are installed.
+
+Shared memory segments are removed by the process which reads them, so a
+payload holding segments can only be loaded once. Segments of payloads
+which are never loaded (eg because the receiver disconnected) are left
+behind until remove_segments is called for the process which wrote them;
+srpo servers do this when they stop, and terminate does it for the servers
+it kills. Segments written by clients for servers which die before reading
+them are not removed.
+"""
+import glob
+import mmap
+import os
+import pickle
+import tempfile
+import zlib
+from contextlib import suppress
+from pathlib import Path
+from typing import Optional
+
+from srpo.lazy import lazy_import
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+# optional dependency, slow to import so only imported when first used
+cloudpickle = lazy_import("cloudpickle")
+
+# Tags for the first byte of a payload.
+_PLAIN = b"P"
+_SHARED = b"S"
+_MSGPACK = b"M"
+_CLOUD_PLAIN = b"C"
+_CLOUD_SHARED = b"D"
+# compressed payloads have a second byte for the codec
+_COMPRESSED = b"Z"
+
+# msgpack extension code used to keep tuples from becoming lists
+_TUPLE_EXT = 1
+
+_SERIALIZE_STATE = dict(
+    # buffers at least this many bytes are passed through shared memory
+    shm_threshold=2 ** 20,
+    # directory in which shared memory segments are created
+    shm_dir=Path("/dev/shm") if Path("/dev/shm").is_dir() else None,
+)
+
+
+def set_shared_memory_threshold(nbytes: int):
+    """
+    Set the buffer size (in bytes) above which shared memory is used.
+
+    Parameters
+    ----------
+    nbytes
+        The threshold in bytes. Use None to disable shared memory transfer.
+    """
+    _SERIALIZE_STATE["shm_threshold"] = nbytes
+
+
+# --- shared memory
+
+
+def _to_shared_memory(buffer: pickle.PickleBuffer):
+    """ Copy a buffer into a new shared memory segment, return (path, size). """
+    view = buffer.raw()
+    shm_dir = _SERIALIZE_STATE["shm_dir"] or tempfile.gettempdir()
+    fd, path = tempfile.mkstemp(prefix=_segment_prefix(os.getpid()), dir=shm_dir)
+    try:
+        os.ftruncate(fd, view.nbytes)
+        with mmap.mmap(fd, view.nbytes) as mm:
+            mm[:] = view
+    except Exception:
+        os.unlink(path)
+        raise
+    finally:
+        os.close(fd)
+    return path, view.nbytes
+
+
+def _from_shared_memory(path, nbytes) -> mmap.mmap:
+    """
+    Map a shared memory segment and unlink it.
+
+    The mapping is copy-on-write so the resulting objects are writable and
+    the segment is released once they are garbage collected.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return mmap.mmap(fd, nbytes, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+def _unlink_segments(segments):
+    """ Remove shared memory segments which will never be read. """
+    for path, _ in segments:
+        with suppress(OSError):
+            os.unlink(path)
+
+
+def _segment_prefix(pid: int) -> str:
+    """ Return the file name prefix of segments written by process pid. """
+    return f"srpo_{pid}_"
+
+
+def remove_segments(pid: Optional[int] = None):
+    """
+    Remove the shared memory segments written by a process not yet read.
+
+    Parameters
+    ----------
+    pid
+        The id of the process which wrote the segments, by default this one.
+    """
+    shm_dir = _SERIALIZE_STATE["shm_dir"] or tempfile.gettempdir()
+    prefix = _segment_prefix(os.getpid() if pid is None else pid)
+    for path in glob.glob(os.path.join(shm_dir, glob.escape(prefix) + "*")):
+        with suppress(OSError):
+            os.unlink(path)
+
+
+def uses_shared_memory(payload) -> bool:
+    """
+    Return True if a payload (from dumps or dump_results) holds shared
+    memory segments, which only one reader can load.
+
+    Compressed payloads have to be decompressed to tell, so check before
+    compressing where possible.
+    """
+    if not isinstance(payload, (bytes, bytearray, memoryview)):
+        return any(uses_shared_memory(x) for x in payload if isinstance(x, bytes))
+    if payload[:1] == _COMPRESSED:
+        payload = _decompress(payload)
+    return bytes(payload[:1]) in (_SHARED, _CLOUD_SHARED)
+
+
+# --- serializers
+
+
+class PickleSerializer:
+    """ Pickle protocol 5 with large buffers passed through shared memory. """
+
+    name = "pickle"
+    tags = (_PLAIN, _SHARED)
+    _module = pickle
+
+    def dumps(self, value) -> bytes:
+        """ Serialize value, return tagged bytes. """
+        plain_tag, shared_tag = self.tags
+        threshold = _SERIALIZE_STATE["shm_threshold"]
+        if threshold is None:
+            return plain_tag + self._module.dumps(value, protocol=5)
+        segments = []
+
+        def _buffer_callback(buffer):
+            """ Return True to keep the buffer in-band. """
+            with buffer.raw() as view:
+                if view.nbytes < threshold:
+                    return True
+            segments.append(_to_shared_memory(buffer))
+            return False
+
+        try:
+            data = self._module.dumps(
+                value, protocol=5, buffer_callback=_buffer_callback
+            )
+        except BaseException:
+            _unlink_segments(segments)
+            raise
+        if not segments:
+            return plain_tag + data
+        return shared_tag + pickle.dumps((data, segments), protocol=5)
+
+    def loads(self, payload):
+        """ Deserialize tagged bytes created by dumps. """
+        tag, body = payload[:1], memoryview(payload)[1:]
+        if tag == self.tags[0]:
+            return pickle.loads(body)
+        data, segments = pickle.loads(body)
+        buffers = [_from_shared_memory(path, nbytes) for path, nbytes in segments]
+        return pickle.loads(data, buffers=buffers)
+
+
+class CloudpickleSerializer(PickleSerializer):
+    """ Like PickleSerializer but able to serialize closures and lambdas. """
+
+    name = "cloudpickle"
+    tags = (_CLOUD_PLAIN, _CLOUD_SHARED)
+    _module = cloudpickle
+
+
+def _msgpack_default(value):
+    """ Encode the types msgpack doesn't handle (strictly) itself. """
+    if type(value) is tuple:
+        return msgpack.ExtType(_TUPLE_EXT, _msgpack_packb(list(value)))
+    raise TypeError(f"msgpack can't serialize {type(value)}")
+
+
+def _msgpack_ext_hook(code, data):
+    """ Decode extension types created by _msgpack_default. """
+    if code == _TUPLE_EXT:
+        return tuple(_msgpack_unpackb(data))
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_packb(value):
+    """ Pack a value with msgpack, keeping types strictly. """
+    return msgpack.packb(
+        value, default=_msgpack_default, strict_types=True, use_bin_type=True
+    )
+
+
+def _msgpack_unpackb(data):
+    """ Unpack data created by _msgpack_packb. """
+    return msgpack.unpackb(
+        data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False
+    )
+
+
+class MsgpackSerializer:
+    """
+    msgpack for plain data (None, bool, int, float, str, bytes, list, tuple
+    and dict) of exactly those types; anything else raises TypeError.
+    """
+
+    name = "msgpack"
+    tags = (_MSGPACK,)
+
+    def dumps(self, value) -> bytes:
+        """ Serialize value, return tagged bytes. """
+        return _MSGPACK + _msgpack_packb(value)
+
+    def loads(self, payload):
+        """ Deserialize tagged bytes created by dumps. """
+        return _msgpack_unpackb(memoryview(payload)[1:])
+
+
+# name -> serializer, tag -> serializer, type -> serializer name
+_SERIALIZERS = {}
+_TAGS = {}
+_TYPE_SERIALIZERS = {}
+# the order serializers are tried in when no preference is given
+_AUTO_ORDER = ("msgpack", "pickle", "cloudpickle")
+
+
+def register_serializer(serializer):
+    """
+    Register a serializer so it can be chosen by name.
+
+    Parameters
+    ----------
+    serializer
+        An object with a name, a tuple of one byte tags (which prefix its
+        payloads), and dumps/loads methods.
+    """
+    _SERIALIZERS[serializer.name] = serializer
+    for tag in serializer.tags:
+        _TAGS[tag] = serializer
+
+
+def register_type(cls: type, name: str):
+    """
+    Use a serializer first for values of a type when no preference is given.
+
+    Parameters
+    ----------
+    cls
+        The type (subclasses are included).
+    name
+        The name of a registered serializer.
+    """
+    _TYPE_SERIALIZERS[cls] = name
+
+
+register_serializer(PickleSerializer())
+if msgpack is not None:
+    register_serializer(MsgpackSerializer())
+if cloudpickle is not None:
+    register_serializer(CloudpickleSerializer())
+
+
+def _serializer_order(preference, hint):
+    """ Return the names of serializers to try, in order. """
+    if preference == "auto":
+        mro = type(hint).__mro__
+        names = [_TYPE_SERIALIZERS[x] for x in mro if x in _TYPE_SERIALIZERS][:1]
+        names.extend(_AUTO_ORDER)
+    else:
+        if preference not in _SERIALIZERS:
+            msg = f"unknown or unavailable serializer {preference}"
+            raise ValueError(msg)
+        names = [preference, "pickle", "cloudpickle"]
+    return [x for x in dict.fromkeys(names) if x in _SERIALIZERS]
+
+
+_NOTHING = object()
+
+
+def dumps(value, serializer: str = "auto", hint=_NOTHING) -> bytes:
+    """
+    Serialize a value for sending in a single message.
+
+    Parameters
+    ----------
+    value
+        Any object one of the serializers can handle.
+    serializer
+        The name of the preferred serializer or "auto". If it fails the
+        others are tried.
+    hint
+        The value whose type is used to pick a serializer, if not value.
+    """
+    hint = value if hint is _NOTHING else hint
+    error = None
+    for name in _serializer_order(serializer, hint):
+        try:
+            return _SERIALIZERS[name].dumps(value)
+        except Exception as e:
+            error = e
+    raise error
+
+
+def loads(payload: bytes):
+    """
+    Deserialize a payload created with dumps.
+
+    Parameters
+    ----------
+    payload
+        The bytes returned from dumps (and possibly compress).
+    """
+    tag = payload[:1]
+    if tag == _COMPRESSED:
+        return loads(_decompress(payload))
+    return _TAGS[tag].loads(payload)
+
+
+def dump_results(results, serializer: str = "auto"):
+    """
+    Serialize a sequence of (success, value) results.
+
+    If the whole sequence can't be serialized each result that can be is
+    serialized on its own and the rest are left to rpyc (as netrefs).
+    """
+    hint = results[0][1] if len(results) == 1 else results
+    try:
+        return dumps(results, serializer, hint=hint)
+    except Exception:
+        pass
+    out = []
+    for result in results:
+        try:
+            out.append(dumps(result, serializer, hint=result[1]))
+        except Exception:
+            out.append(tuple(result))
+    return tuple(out)
+
+
+def load_results(payload):
+    """ Deserialize the output of dump_results. """
+    if isinstance(payload, bytes):
+        return loads(payload)
+    return [loads(x) if isinstance(x, bytes) else x for x in payload]
+
+
+# --- compression
+
+# name -> (tag, compress, decompress) of the available codecs, best first
+_CODECS = {}
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+else:
+    _CODECS["zstd"] = (
+        b"s",
+        lambda x: zstandard.ZstdCompressor().compress(x),
+        lambda x: zstandard.ZstdDecompressor().decompress(x),
+    )
+
+try:
+    import lz4.frame
+except ImportError:  # optional dependency
+    pass
+else:
+    _CODECS["lz4"] = (b"l", lz4.frame.compress, lz4.frame.decompress)
+
+_CODECS["zlib"] = (b"z", lambda x: zlib.compress(x, 1), zlib.decompress)
+_CODEC_TAGS = {tag: (name, decomp) for name, (tag, _, decomp) in _CODECS.items()}
+
+
+def get_codecs(compression="auto") -> tuple:
+    """
+    Return the names of the usable codecs for a compression setting.
+
+    Parameters
+    ----------
+    compression
+        "auto" for every available codec (best first), None for no
+        compression, or the name of one codec ("zstd", "lz4" or "zlib").
+    """
+    if compression is None:
+        return ()
+    if compression == "auto":
+        return tuple(_CODECS)
+    if compression not in _CODECS:
+        raise ValueError(f"unknown or unavailable compression {compression}")
+    return (compression,)
+
+
+def compress(payload: bytes, codec: Optional[str], threshold: int = 0) -> bytes:
+    """
+    Compress a payload if it is at least threshold bytes.
+
+    The payload is only replaced if compression makes it smaller.
+
+    Parameters
+    ----------
+    payload
+        The bytes returned from dumps.
+    codec
+        The name of the codec or None to not compress.
+    threshold
+        The minimum payload size (in bytes) worth compressing.
+    """
+    if codec is None or len(payload) < threshold or payload[:1] == _COMPRESSED:
+        return payload
+    tag, func, _ = _CODECS[codec]
+    out = _COMPRESSED + tag + func(payload)
+    return out if len(out) < len(payload) else payload
+
+
+def _decompress(payload) -> bytes:
+    """ Undo compress. """
+    _, func = _CODEC_TAGS[bytes(payload[1:2])]
+    return func(memoryview(payload)[2:])
@@ -0,0 +1,156 @@
+"""
+Low overhead per-method metrics for servers and proxies.
+
+Each method gets call and error counts, bytes in and out, and latency
+histograms. Latencies are bucketed by powers of two microseconds so
+recording is a few additions under a lock.
+"""
+import threading
+from bisect import bisect_left
+
+# upper bounds (in seconds) of the latency buckets, the last is unbounded
+BUCKETS = tuple(2 ** x / 1e6 for x in range(25)) + (float("inf"),)
+
+
+class MethodStats:
+    """ Counters and latency histograms for one method. """
+
+    __slots__ = ("calls", "errors", "bytes_in", "bytes_out", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        # latency kind (eg "execution") -> [count per bucket, total seconds]
+        self.latencies = {}
+
+    def add_latency(self, kind: str, seconds: float):
+        """ Record a latency (in seconds) in the histogram for kind. """
+        if kind not in self.latencies:
+            self.latencies[kind] = [[0] * len(BUCKETS), 0.0]
+        counts, _ = hist = self.latencies[kind]
+        counts[bisect_left(BUCKETS, seconds)] += 1
+        hist[1] += seconds
+
+    def to_dict(self) -> dict:
+        """ Return the stats as plain data. """
+        return dict(
+            calls=self.calls,
+            errors=self.errors,
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            latencies={
+                kind: dict(counts=list(counts), total=total)
+                for kind, (counts, total) in self.latencies.items()
+            },
+        )
+
+
+class Metrics:
+    """
+    A thread safe collection of MethodStats keyed by method name.
+
+    Parameters
+    ----------
+    enabled
+        If False nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def record(
+        self,
+        method: str,
+        error: bool = False,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        **latencies,
+    ):
+        """
+        Record one call of a method.
+
+        Parameters
+        ----------
+        method
+            The name of the method (or operation).
+        error
+            True if the call raised.
+        bytes_in
+            The size of the payload received.
+        bytes_out
+            The size of the payload sent.
+        **latencies
+            Latencies in seconds by kind (eg execution=0.1, queue_wait=0.01).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+            stats.calls += 1
+            stats.errors += bool(error)
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            for kind, seconds in latencies.items():
+                if seconds is not None:
+                    stats.add_latency(kind, max(seconds, 0.0))
+
+    def snapshot(self) -> dict:
+        """ Return {method: stats dict} for every recorded method. """
+        with self._lock:
+            return {name: x.to_dict() for name, x in self._methods.items()}
+
+    def reset(self):
+        """ Forget everything recorded so far. """
+        with self._lock:
+            self._methods.clear()
+
+
+def percentile(histogram: dict, fraction: float) -> float:
+    """
+    Estimate a percentile from a histogram, return the bucket's upper bound.
+
+    Parameters
+    ----------
+    histogram
+        A latency histogram from MethodStats.to_dict.
+    fraction
+        The percentile as a fraction (eg 0.99).
+    """
+    counts = histogram["counts"]
+    target = fraction * sum(counts)
+    running = 0
+    for bound, count in zip(BUCKETS, counts):
+        running += count
+        if count and running >= target:
+            return bound
+    return 0.0
+
+
+def format_stats(snapshot: dict) -> str:
+    """ Return a table of the stats from Metrics.snapshot. """
+    header = (
+        f"{'method':<24}{'calls':>8}{'errors':>8}{'bytes in':>12}"
+        f"{'bytes out':>12}  latency (mean / p50 / p99 ms)"
+    )
+    lines = [header]
+    for name, stats in sorted(snapshot.items()):
+        lines.append(
+            f"{name:<24}{stats['calls']:>8}{stats['errors']:>8}"
+            f"{stats['bytes_in']:>12}{stats['bytes_out']:>12}"
+        )
+        for kind, hist in sorted(stats["latencies"].items()):
+            count = sum(hist["counts"]) or 1
+            values = (
+                hist["total"] / count,
+                percentile(hist, 0.5),
+                percentile(hist, 0.99),
+            )
+            ms = " / ".join(f"{x * 1000:.3f}" for x in values)
+            lines.append(f"{'':<4}{kind:<62}{ms}")
+    return "\n".join(lines)
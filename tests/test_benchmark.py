@@ -0,0 +1,71 @@
+"""
+Tests for the benchmark helpers.
+"""
+
+from srpo.benchmark import (
+    bench_calls,
+    bench_concurrency,
+    bench_import,
+    compare_results,
+    format_results,
+    get_payloads,
+    load_results,
+    save_results,
+)
+
+
+def _results(**medians):
+    """ Return results with the given median times. """
+    results = {x: dict(n=1, min=y, max=y, mean=y, median=y) for x, y in medians.items()}
+    return dict(metadata={}, results=results)
+
+
+class TestCompareResults:
+    """ Tests for finding regressions between results. """
+
+    def test_slower_benchmarks_reported(self):
+        """ Only benchmarks slower than the tolerance should be reported. """
+        old = _results(a=1.0, b=1.0, c=1.0)
+        new = _results(a=2.0, b=1.1, c=0.5)
+        assert compare_results(old, new, tolerance=0.25) == {"a": 2.0}
+
+    def test_missing_benchmarks_ignored(self):
+        """ Benchmarks only in one result can't be compared. """
+        assert not compare_results(_results(a=1.0), _results(b=5.0))
+
+    def test_round_trip_json(self, tmp_path):
+        """ Saved results should load back unchanged. """
+        results = _results(a=1.0)
+        path = tmp_path / "results.json"
+        save_results(results, path)
+        assert load_results(path) == results
+        assert "a" in format_results(results)
+
+
+class TestBenchmarks:
+    """ Smoke tests for the benchmarks themselves. """
+
+    def test_calls(self, registry_path):
+        """ Ensure the call benchmarks run and return timings. """
+        out = bench_calls(registry_path, number=5)
+        assert set(out) == {"null_call", "getitem", "setitem"}
+        assert all(x["n"] == 5 for x in out.values())
+
+    def test_import(self):
+        """ Import times should be measured in new interpreters. """
+        out = bench_import(number=2)
+        assert set(out) == {"import.srpo", "import.srpo.core"}
+        assert all(x["n"] == 2 and x["min"] > 0 for x in out.values())
+
+    def test_concurrency(self, registry_path):
+        """ Ensure throughput is measured for each combination. """
+        out = bench_concurrency(registry_path, (1, 2), (1,), number=5)
+        assert len(out) == 2
+        assert all(x["calls_per_second"] > 0 for x in out.values())
+
+    def test_payloads(self):
+        """ Payloads of each kind should be made for each size. """
+        payloads = get_payloads((10,))
+        assert payloads["bytes.10"] == bytes(10)
+        if "numpy.10" in payloads:
+            assert payloads["numpy.10"].nbytes == 8
@@ -0,0 +1,87 @@
+"""
+Tests for the cache of memoized results.
+"""
+import time
+
+from srpo.cache import ResultCache, get_memoize_methods, make_key, memoize
+
+
+class TestMakeKey:
+    """ Tests for keying calls. """
+
+    def test_equal_calls_equal_keys(self):
+        """ Keyword argument order shouldn't matter. """
+        key1 = make_key("search", (1,), {"a": 1, "b": 2})
+        key2 = make_key("search", (1,), {"b": 2, "a": 1})
+        assert key1 == key2
+        assert key1 != make_key("search", (2,), {"a": 1, "b": 2})
+
+    def test_types_distinguished(self):
+        """ Equal arguments of different types should get different keys. """
+        keys = {make_key("show", (x,)) for x in (1, 1.0, True)}
+        assert len(keys) == 3
+        assert make_key("show", ((1,),)) != make_key("show", ((True,),))
+        assert make_key("show", (), {"x": 1}) != make_key("show", (), {"x": 1.0})
+
+    def test_unhashable(self):
+        """ Calls with unhashable arguments can't be cached. """
+        assert make_key("search", ([1, 2],)) is None
+
+
+class TestResultCache:
+    """ Tests for the LRU cache bounded by bytes. """
+
+    def test_hits_and_misses(self):
+        """ Hits and misses should be counted. """
+        cache = ResultCache()
+        assert cache.get("a") is None
+        cache.put("a", b"bob")
+        assert cache.get("a") == b"bob"
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["bytes"]) == (1, 1, 3)
+
+    def test_lru_eviction_by_bytes(self):
+        """ The least recently used entries are dropped to fit max_bytes. """
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", bytes(4))
+        cache.put("b", bytes(4))
+        cache.get("a")
+        cache.put("c", bytes(4))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+        cache.put("d", bytes(11))  # too big to ever fit
+        assert cache.get("d") is None
+
+    def test_ttl(self):
+        """ Entries should expire after the ttl. """
+        cache = ResultCache(ttl=0.05)
+        cache.put("a", b"bob")
+        assert cache.get("a") == b"bob"
+        time.sleep(0.1)
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_clear_rejects_stale_puts(self):
+        """ Results computed before a clear shouldn't be stored. """
+        cache = ResultCache()
+        generation = cache.generation
+        cache.clear()
+        cache.put("a", b"bob", generation)
+        assert cache.get("a") is None
+        cache.put("a", b"bob", cache.generation)
+        assert cache.get("a") == b"bob"
+
+    def test_get_memoize_methods(self):
+        """ Methods can be named or decorated. """
+
+        class _Obj:
+            @memoize
+            def a(self):
+                pass
+
+            def b(self):
+                pass
+
+        assert get_memoize_methods(_Obj(), ["a", "b"], ["b"]) == {"a", "b"}
+        assert get_memoize_methods(_Obj(), ["a", "b"]) == {"a"}
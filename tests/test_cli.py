@@ -1,7 +1,9 @@
 """
 Tests for the cli
 """
-from subprocess import run
+import pstats
+import time
+from subprocess import Popen, run
 
 import srpo
 
@@ -26,3 +28,38 @@ class TestKill:
         cmd = f"srpo kill --name {name} --registry-path {registry_path}"
         run(cmd, shell=True)
         assert name not in srpo.get_registry()
+
+
+class TestStats:
+    def test_stats_show_methods(self, registry_path):
+        """Ensure the metrics of called methods are shown."""
+        name = "transcended_stats"
+        proxy = srpo.transcend({"a": 1}, name)
+        proxy.keys()
+        cmd = f"srpo stats {name} --registry-path {registry_path}"
+        res = run(cmd, shell=True, capture_output=True)
+        assert proxy["a"] == 1  # the server is still running
+        srpo.terminate(name)
+        output = res.stdout.decode("utf8")
+        assert "keys" in output
+        assert "execution" in output
+
+
+class TestProfile:
+    def test_profile_writes_pstats(self, registry_path, tmp_path):
+        """Ensure a pstats file is written for a running server."""
+        name = "transcended_profile"
+        proxy = srpo.transcend({"a": 1}, name)
+        path = tmp_path / "out.pstats"
+        cmd = (
+            f"srpo profile {name} --seconds 2 --output {path} "
+            f"--registry-path {registry_path}"
+        )
+        process = Popen(cmd, shell=True)
+        deadline = time.time() + 20
+        while not path.exists() and time.time() < deadline:
+            proxy.keys()
+        process.wait()
+        srpo.terminate(name)
+        stats = pstats.Stats(str(path))
+        assert any("keys" in func[2] for func in stats.stats)
@@ -0,0 +1,193 @@
+"""
+Tests for declaring read-only methods, the reader-writer lock and coalescing.
+"""
+import threading
+import time
+
+import pytest
+
+from srpo.concurrency import AccessControl, RWLock, get_read_methods, mutating
+from srpo.concurrency import SingleFlight, coalesce, get_coalesce_methods, read_only
+
+
+class Bank:
+    """ An object with marked and unmarked methods. """
+
+    @read_only
+    def read_index(self):
+        pass
+
+    @mutating
+    def update_index(self):
+        pass
+
+    def get_waveforms(self):
+        pass
+
+    def put_waveforms(self):
+        pass
+
+
+class TestGetReadMethods:
+    """ Tests for finding the read-only methods of an object. """
+
+    methods = ("read_index", "update_index", "get_waveforms", "put_waveforms")
+
+    def test_decorators(self):
+        """ Only decorated methods are read-only by default. """
+        out = get_read_methods(Bank(), self.methods)
+        assert out == {"read_index"}
+
+    def test_names(self):
+        """ Listed names are read-only, even if marked mutating. """
+        out = get_read_methods(Bank(), self.methods, ["get_waveforms"])
+        assert out == {"read_index", "get_waveforms"}
+
+    def test_policy(self):
+        """ A policy decides for methods which aren't marked. """
+        policy = lambda name: name.startswith(("get", "update"))  # noqa: E731
+        out = get_read_methods(Bank(), self.methods, policy)
+        assert out == {"read_index", "get_waveforms"}
+
+
+class TestRWLock:
+    """ Tests for the reader-writer lock. """
+
+    def _peak(self, lock, kinds):
+        """ Hold the lock in a thread per kind, return the peak holders. """
+        state = dict(active=0, peak=0)
+        guard = threading.Lock()
+
+        def _hold(kind):
+            with getattr(lock, kind)():
+                with guard:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.05)
+                with guard:
+                    state["active"] -= 1
+
+        threads = [threading.Thread(target=_hold, args=(x,)) for x in kinds]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return state["peak"]
+
+    def test_readers_share(self):
+        """ Readers should hold the lock at the same time. """
+        assert self._peak(RWLock(), ["read"] * 4) == 4
+
+    def test_writers_exclusive(self):
+        """ Writers should never overlap readers or each other. """
+        assert self._peak(RWLock(), ["write"] * 3) == 1
+        assert self._peak(RWLock(), ["write", "read"]) == 1
+        assert self._peak(RWLock(), ["read", "write"]) == 1
+
+    def test_writer_reentrant(self):
+        """ The writer may take the lock again without deadlocking. """
+        lock = RWLock()
+        with lock.write():
+            with lock.write(), lock.read():
+                pass
+        assert self._peak(lock, ["read"] * 2) == 2
+
+
+class TestAccessControl:
+    """ Tests for deciding how operations are guarded. """
+
+    def test_bad_mode_raises(self):
+        """ Unknown modes should raise. """
+        with pytest.raises(ValueError):
+            AccessControl("bob")
+
+    def test_is_read(self):
+        """ Calls are reads only if the method is read-only. """
+        access = AccessControl("rw", {"read_index"})
+        assert access.is_read("call", "read_index", {"getitem"})
+        assert not access.is_read("call", "get_waveforms", {"getitem"})
+        assert access.is_read("getitem", None, {"getitem"})
+
+
+class TestSingleFlight:
+    """ Tests for sharing runs of concurrent calls. """
+
+    def _run_at_once(self, flight, keys, func):
+        """ Run func under each key from its own thread, return the results. """
+        results = [None] * len(keys)
+
+        def _target(i):
+            results[i] = flight.run(keys[i], func)
+
+        threads = [
+            threading.Thread(target=_target, args=(i,)) for i in range(len(keys))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_equal_keys_share(self):
+        """ Concurrent callers with one key should share a single run. """
+        runs = []
+
+        def _func():
+            runs.append(1)
+            time.sleep(0.2)
+            return len(runs)
+
+        results = self._run_at_once(SingleFlight(), ["a"] * 3, _func)
+        assert len(runs) == 1
+        assert sorted(x[1] for x in results) == [False, True, True]
+        assert {x[0] for x in results} == {1}
+
+    def test_different_keys_run(self):
+        """ Callers with different keys run separately. """
+        runs = []
+
+        def _func():
+            runs.append(1)
+            time.sleep(0.05)
+
+        self._run_at_once(SingleFlight(), ["a", "b", "c"], _func)
+        assert len(runs) == 3
+
+    def test_errors_shared(self):
+        """ Waiting callers should get the leader's error. """
+        flight = SingleFlight()
+
+        def _func():
+            time.sleep(0.1)
+            raise ValueError("bob")
+
+        errors = []
+
+        def _target():
+            try:
+                flight.run("a", _func)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_target) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 2
+        # the key is released once the run finishes
+        assert flight.run("a", lambda: 1) == (1, False)
+
+    def test_get_coalesce_methods(self):
+        """ Methods can be named or decorated. """
+
+        class _Obj:
+            @coalesce
+            def a(self):
+                pass
+
+            def b(self):
+                pass
+
+        methods = get_coalesce_methods(_Obj(), ["a", "b", "c"], ["b"])
+        assert methods == {"a", "b"}
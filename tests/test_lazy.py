@@ -0,0 +1,66 @@
+"""
+Tests for deferred imports.
+"""
+import subprocess
+import sys
+
+from srpo.lazy import LazyModule, lazy_import
+
+
+def _imported_after(statement, modules):
+    """ Return which of modules are imported after running statement. """
+    found = f"[x for x in {modules!r} if x in sys.modules]"
+    code = f"import sys; {statement}; print({found})"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    return eval(out.stdout)
+
+
+class TestLazyModule:
+    """ Tests for modules imported on first use. """
+
+    def test_imported_on_attribute_access(self):
+        """ The module should be imported, and configured once, when used. """
+        calls = []
+        module = LazyModule("json", on_import=calls.append)
+        assert module.dumps([1]) == "[1]"
+        assert module.loads("[1]") == [1]
+        assert len(calls) == 1 and calls[0].__name__ == "json"
+
+    def test_lazy_import_missing(self):
+        """ Modules which aren't installed give None. """
+        assert lazy_import("not_a_real_module_bob") is None
+        assert isinstance(lazy_import("json"), LazyModule)
+
+
+class TestImportCost:
+    """ Importing srpo shouldn't import its heavy dependencies. """
+
+    heavy = ["rpyc", "psutil", "sqlitedict", "asyncio", "cloudpickle"]
+
+    def test_import_srpo(self):
+        """ Importing the package only imports what it needs to. """
+        modules = self.heavy + ["srpo.core", "typer"]
+        assert _imported_after("import srpo", modules) == []
+
+    def test_import_core(self):
+        """ Importing srpo.core defers rpyc, psutil etc. until first use. """
+        assert _imported_after("import srpo.core", self.heavy) == []
+
+    def test_public_names(self):
+        """ The public names should be imported from their modules. """
+        statement = "import srpo; srpo.transcend; srpo.memoize"
+        assert _imported_after(statement, ["srpo.core", "srpo.cache"]) == [
+            "srpo.core",
+            "srpo.cache",
+        ]
+
+    def test_submodules(self):
+        """ Submodules can be used after only importing srpo. """
+        statement = "import srpo; srpo.core.set_registry_path; srpo.set_registry_path"
+        assert _imported_after(statement, ["srpo.core"]) == ["srpo.core"]
+
+    def test_missing_attribute(self):
+        """ Names which aren't exported or submodules should raise. """
+        statement = "import srpo; assert not hasattr(srpo, 'bob')"
+        assert _imported_after(statement, ["srpo.core"]) == []
@@ -0,0 +1,174 @@
+"""
+Tests for the registry of transcended objects.
+"""
+import multiprocessing
+import os
+
+import pytest
+from sqlitedict import SqliteDict
+
+import srpo.registry
+from srpo.registry import (
+    DirectoryRegistry,
+    SharedMemoryRegistry,
+    SqliteRegistry,
+    open_registry,
+    register_backend,
+)
+
+
+def _write_many(path, prefix, number):
+    """ Register number names from another process. """
+    registry = open_registry(path)
+    for i in range(number):
+        registry[f"{prefix}_{i}"] = (prefix, i)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """ Return a registry in a temporary directory. """
+    registry = SqliteRegistry(tmp_path / "registry.sqlite")
+    yield registry
+    registry.close()
+
+
+class TestSqliteRegistry:
+    """ Tests for the cached sqlite registry. """
+
+    def test_set_get_pop(self, registry):
+        """ Ensure the mapping interface works. """
+        registry["bob"] = ("localhost", 1, 2)
+        assert "bob" in registry
+        assert registry["bob"] == ("localhost", 1, 2)
+        assert dict(registry) == {"bob": ("localhost", 1, 2)}
+        assert registry.pop("bob") == ("localhost", 1, 2)
+        assert not registry
+
+    def test_sees_changes_from_other_process(self, registry):
+        """ Values written by another process should be visible. """
+        assert "bill" not in registry
+
+        def _func():
+            with SqliteDict(registry.filename, tablename="server") as other:
+                other["bill"] = 2
+                other.commit()
+
+        proc = multiprocessing.Process(target=_func)
+        proc.start()
+        proc.join()
+        assert registry["bill"] == 2
+
+    def test_file_deleted(self, registry):
+        """ The registry should notice when its file is deleted. """
+        registry["bob"] = 1
+        os.unlink(registry.filename)
+        assert "bob" not in registry
+        registry["bill"] = 2
+        assert dict(SqliteDict(registry.filename, tablename="server")) == {"bill": 2}
+
+    def test_open_registry_cached(self, tmp_path):
+        """ The same registry instance is returned for a path. """
+        path = tmp_path / "registry.sqlite"
+        assert open_registry(path) is open_registry(str(path))
+
+
+@pytest.fixture(params=["sqlite", "dir", "shm"])
+def any_registry_path(request, tmp_path):
+    """ Return the path of a registry of each backend, remove it after. """
+    if request.param == "sqlite":
+        path = str(tmp_path / "registry.sqlite")
+    elif request.param == "dir":
+        path = f"dir://{tmp_path / 'registry'}"
+    else:
+        path = f"shm://srpo_test_{os.getpid()}_{tmp_path.name}"
+    yield path
+    registry = open_registry(path)
+    for key in list(registry):
+        del registry[key]
+    registry.unlink()
+
+
+@pytest.fixture
+def any_registry(any_registry_path):
+    """ Return a registry of each backend. """
+    return open_registry(any_registry_path)
+
+
+class TestBackends:
+    """ Tests which every registry backend should pass. """
+
+    def test_mapping_interface(self, any_registry):
+        """ Ensure the mapping interface works. """
+        any_registry["bob"] = ("localhost", 1, 2)
+        assert "bob" in any_registry
+        assert any_registry["bob"] == ("localhost", 1, 2)
+        assert dict(any_registry) == {"bob": ("localhost", 1, 2)}
+        assert any_registry.pop("bob") == ("localhost", 1, 2)
+        assert "bob" not in any_registry
+        with pytest.raises(KeyError):
+            any_registry["bob"]
+        assert not any_registry
+
+    def test_odd_names(self, any_registry):
+        """ Names with slashes or leading dots should round trip. """
+        names = ["bob/replica/0", ".hidden", "bill%2F", "caf\u00e9"]
+        for name in names:
+            any_registry[name] = name
+        assert sorted(any_registry) == sorted(names)
+        assert all(any_registry[x] == x for x in names)
+
+    def test_writes_from_many_processes(self, any_registry_path, any_registry):
+        """ Names written by other processes at once should all be seen. """
+        procs = [
+            multiprocessing.Process(
+                target=_write_many, args=(any_registry_path, x, 20)
+            )
+            for x in "abcd"
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        assert len(any_registry) == 80
+        assert any_registry["c_19"] == ("c", 19)
+
+
+class TestDirectoryRegistry:
+    """ Tests for the one file per name registry. """
+
+    def test_values_replaced_atomically(self, tmp_path):
+        """ Values are written to a temporary file then renamed. """
+        registry = DirectoryRegistry(tmp_path / "registry")
+        registry["bob"] = 1
+        registry["bob"] = 2
+        assert os.listdir(registry.filename) == ["bob"]
+        assert registry["bob"] == 2
+
+    def test_sees_changes_from_other_instance(self, tmp_path):
+        """ Cached values are re-read when the file changes. """
+        registry = DirectoryRegistry(tmp_path / "registry")
+        other = DirectoryRegistry(tmp_path / "registry")
+        registry["bob"] = 1
+        assert other["bob"] == 1
+        registry["bob"] = 2
+        assert other["bob"] == 2
+        del registry["bob"]
+        assert "bob" not in other
+
+    def test_shared_memory_location(self):
+        """ The shared memory registry should live in /dev/shm if it exists. """
+        registry = SharedMemoryRegistry("srpo_bob")
+        if os.path.isdir("/dev/shm"):
+            assert registry.filename == "/dev/shm/srpo_bob"
+
+    def test_open_registry_backends(self, tmp_path):
+        """ The path's scheme selects the backend. """
+        path = tmp_path / "registry"
+        assert isinstance(open_registry(f"dir://{path}"), DirectoryRegistry)
+        assert isinstance(open_registry(path), SqliteRegistry)
+
+    def test_register_backend(self, tmp_path, monkeypatch):
+        """ New backends can be registered by scheme. """
+        monkeypatch.setattr(srpo.registry, "_BACKENDS", dict(srpo.registry._BACKENDS))
+        register_backend("bob", lambda location: DirectoryRegistry(tmp_path))
+        assert open_registry("bob://anything").filename == str(tmp_path)
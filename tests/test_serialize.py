@@ -0,0 +1,218 @@
+"""
+Tests for serializing values sent between proxies and servers.
+"""
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from srpo import coalesce, get_proxy, memoize, transcend, terminate
+from srpo.serialize import compress, dumps, get_codecs, loads, register_type
+from srpo.serialize import remove_segments
+from srpo.serialize import _SERIALIZE_STATE, _TYPE_SERIALIZERS
+
+
+class MyList(list):
+    """ A list subclass for testing type registration. """
+
+
+class Blob:
+    """ Bytes which are pickled out-of-band, like a numpy array. """
+
+    def __init__(self, data):
+        self.data = bytearray(data)
+
+    def __reduce_ex__(self, protocol):
+        return type(self), (pickle.PickleBuffer(self.data),)
+
+    def __eq__(self, other):
+        return isinstance(other, Blob) and self.data == other.data
+
+
+class BlobStore(dict):
+    """ A dict with memoized and coalesced methods returning its values. """
+
+    runs = 0
+
+    @memoize
+    def blob(self, key):
+        return self[key]
+
+    @coalesce
+    def slow_blob(self, key):
+        self.runs += 1
+        time.sleep(0.3)
+        return self[key]
+
+
+@pytest.fixture
+def small_shm_threshold():
+    """ Lower the shared memory threshold so small buffers use it. """
+    old = _SERIALIZE_STATE["shm_threshold"]
+    _SERIALIZE_STATE["shm_threshold"] = 16
+    yield
+    _SERIALIZE_STATE["shm_threshold"] = old
+
+
+class TestDumpsLoads:
+    """ Tests for the basic serialization round trip. """
+
+    def test_round_trip(self):
+        """ Simple values should survive a round trip. """
+        value = {"a": [1, 2, 3], "b": ("bob", None)}
+        assert loads(dumps(value)) == value
+
+    def test_large_buffer_uses_shared_memory(self, small_shm_threshold):
+        """ Large buffers should be written to a segment then unlinked. """
+        value = pickle.PickleBuffer(bytearray(b"x" * 100))
+        payload = dumps(value)
+        assert payload[:1] == b"S"
+        _, segments = pickle.loads(payload[1:])
+        path = segments[0][0]
+        assert os.path.exists(path)
+        out = loads(payload)
+        assert bytes(out) == b"x" * 100
+        assert not os.path.exists(path)
+
+    def test_unread_segments_removed(self, small_shm_threshold):
+        """ remove_segments should remove segments this process wrote. """
+        payload = dumps(Blob(b"x" * 100))
+        _, segments = pickle.loads(payload[1:])
+        path = segments[0][0]
+        assert os.path.basename(path).startswith(f"srpo_{os.getpid()}_")
+        remove_segments()
+        assert not os.path.exists(path)
+
+    def test_numpy_array_is_writable(self, small_shm_threshold):
+        """ Arrays mapped from shared memory should be usable locally. """
+        np = pytest.importorskip("numpy")
+        array = np.arange(1000)
+        out = loads(dumps(array))
+        assert np.all(out == array)
+        out[0] = 10
+        assert out[0] == 10
+
+
+class TestSharedMemoryTransfer:
+    """ Tests for moving large buffers through transcended objects. """
+
+    def test_large_values_in_and_out(self, small_shm_threshold):
+        """ Large arguments and results should pass through shared memory. """
+        name = "shm_dict"
+        proxy = transcend({}, name)
+        value = Blob(b"y" * 1000)
+        proxy.update({"big": value})
+        assert proxy.get("big") == value
+        terminate(name)
+
+    @pytest.mark.parametrize("compression", [None, "zlib"])
+    def test_memoized_large_values(self, small_shm_threshold, compression):
+        """ Replies in shared memory can only be read once so aren't cached. """
+        name = f"shm_memoized_{compression}"
+        value = Blob(b"z" * 1000)
+        kwargs = dict(compression=compression, compression_threshold=16)
+        proxy = transcend(BlobStore(big=value), name, **kwargs)
+        assert proxy.blob("big") == value
+        assert proxy.blob("big") == value
+        assert loads(proxy.obj.memo_stats())["entries"] == 0
+        terminate(name)
+
+    def test_coalesced_large_values(self, small_shm_threshold):
+        """ Each caller sharing a run should get its own segments. """
+        name = "shm_coalesced"
+        value = Blob(b"z" * 1000)
+        proxy = transcend(BlobStore(big=value), name, server_threads=4)
+        proxies = [get_proxy(name, pooled=False) for _ in range(4)]
+        with ThreadPoolExecutor(len(proxies)) as executor:
+            futures = [executor.submit(x.slow_blob, "big") for x in proxies]
+            assert [x.result() for x in futures] == [value] * 4
+        assert proxy.runs == 1
+        for other in proxies:
+            other._release()
+        terminate(name)
+
+
+class TestSerializers:
+    """ Tests for choosing between serializers. """
+
+    def test_tuples_survive_msgpack(self):
+        """ msgpack should keep tuples as tuples. """
+        pytest.importorskip("msgpack")
+        value = [("call", "bob", (1, 2), {"a": (3,)})]
+        payload = dumps(value)
+        assert payload[:1] == b"M"
+        assert loads(payload) == value
+
+    def test_non_plain_falls_back_to_pickle(self):
+        """ Values msgpack can't handle exactly should be pickled. """
+        pytest.importorskip("msgpack")
+        value = {"a": bytearray(b"bob"), "b": {1, 2}}
+        payload = dumps(value, "msgpack")
+        assert payload[:1] == b"P"
+        assert loads(payload) == value
+
+    def test_lambda_uses_cloudpickle(self):
+        """ Closures can be sent if cloudpickle is installed. """
+        pytest.importorskip("cloudpickle")
+        offset = 2
+        out = loads(dumps(lambda x: x + offset))
+        assert out(1) == 3
+
+    def test_registered_type_used_first(self):
+        """ A serializer registered for a type should be preferred. """
+        pytest.importorskip("cloudpickle")
+        register_type(MyList, "cloudpickle")
+        try:
+            assert dumps(MyList([1]))[:1] == b"C"
+        finally:
+            _TYPE_SERIALIZERS.pop(MyList)
+
+    def test_unknown_serializer_raises(self):
+        """ Asking for a serializer that doesn't exist should raise. """
+        with pytest.raises(ValueError):
+            dumps(1, "not_a_serializer")
+
+    def test_transcend_with_serializer(self):
+        """ The serializer can be chosen for the server and the proxy. """
+        name = "pickle_serializer_dict"
+        transcend({"a": (1, 2)}, name, serializer="pickle")
+        proxy = get_proxy(name, serializer="pickle")
+        assert proxy.get("a") == (1, 2)
+        terminate(name)
+
+
+class TestCompression:
+    """ Tests for compressing large payloads. """
+
+    def test_compress_round_trip(self):
+        """ Compressed payloads should be loaded transparently. """
+        value = "bob" * 1000
+        payload = compress(dumps(value), "zlib", threshold=100)
+        assert payload[:2] == b"Zz"
+        assert loads(payload) == value
+
+    def test_small_payload_not_compressed(self):
+        """ Payloads under the threshold should be left alone. """
+        payload = dumps("bob")
+        assert compress(payload, "zlib", threshold=100) == payload
+
+    def test_unknown_codec_raises(self):
+        """ Unknown codecs should raise. """
+        with pytest.raises(ValueError):
+            get_codecs("not_a_codec")
+
+    def test_transcend_with_compression(self):
+        """ Large results should come back compressed when negotiated. """
+        name = "compressed_dict"
+        kwargs = dict(compression="zlib", compression_threshold=100)
+        proxy = transcend({"a": "bob" * 1000}, name, **kwargs)
+        assert proxy._compression == ("zlib", 100, ("zlib",))
+        calls = dumps([("getitem", None, ("a",), {})])
+        payload = proxy.obj.run_batch(calls, ("zlib",))
+        assert payload[:2] == b"Zz"
+        assert proxy["a"] == "bob" * 1000
+        proxy.update({"b": "bill" * 1000})
+        assert proxy.get("b") == "bill" * 1000
+        terminate(name)
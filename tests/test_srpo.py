@@ -6,7 +6,15 @@ test_srpo
 
 Tests for `srpo` module.
 """
+import asyncio
+import marshal
+import os
+import select
+import socket
+import subprocess
+import sys
 import threading
+import types
 import time
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from types import SimpleNamespace
@@ -15,9 +23,15 @@ from pathlib import Path
 import pytest
 import psutil
 
-from srpo import get_proxy, transcend, terminate
-from srpo.exceptions import SrpoConnectionError
-from srpo.core import get_registry, terminate
+import srpo
+from srpo import get_proxy, get_async_proxy, transcend, terminate
+from srpo import start_warm_pool, stop_warm_pool
+from srpo.exceptions import SrpoConnectionError, SrpoOneWayError
+from srpo.core import get_registry, terminate, SrpoProxy, set_stream_chunk_size
+from srpo.core import get_client_metrics, ShardedProxy, shard_index, _EpollPoll
+from srpo.core import set_proxy_pool_options
+from srpo import transcend_sharded
+from srpo.serialize import loads
 
 
 @pytest.fixture(scope="class")
@@ -240,3 +254,1059 @@ class TestTranscendWithBadEntryInRegistry:
         """ However, a transcended """
         out = transcend({1: 2, 3: 4}, self.name)
         assert out[1] == 2 and out[3] == 4
+
+
+class TestBatch:
+    """ Tests for sending many operations in one round trip. """
+
+    @pytest.fixture(scope="class")
+    def batch_dict(self):
+        """ Transcend a dict for batching. """
+        name = "batch_dict"
+        yield transcend({"a": 1}, name)
+        terminate(name)
+
+    def test_batch_results_in_order(self, batch_dict):
+        """ Ensure queued operations run in order and resolve futures. """
+        with batch_dict.batch() as batch:
+            batch["b"] = 2
+            first = batch.get("b")
+            second = batch["a"]
+            keys = batch.keys()
+        assert first.result() == 2
+        assert second.result() == 1
+        assert set(keys.result()) == {"a", "b"}
+        assert batch_dict["b"] == 2
+
+    def test_batch_errors_set_on_future(self, batch_dict):
+        """ An exception in one operation should not stop the others. """
+        with batch_dict.batch() as batch:
+            missing = batch["not_a_key"]
+            found = batch["a"]
+        with pytest.raises(KeyError):
+            missing.result()
+        assert found.result() == 1
+
+
+class TestAsyncProxy:
+    """ Tests for the asyncio proxy. """
+
+    @pytest.fixture(scope="class")
+    def async_name(self):
+        """ Transcend a dict with a few server threads, return its name. """
+        name = "async_dict"
+        transcend({"a": 1}, name, server_threads=4)
+        yield name
+        terminate(name)
+
+    def test_concurrent_calls(self, async_name):
+        """ Ensure many calls can be awaited at once. """
+
+        async def _run():
+            async with get_async_proxy(async_name) as proxy:
+                await proxy.set_item("b", 2)
+                futures = [proxy.get("a") for _ in range(20)]
+                futures.append(proxy["b"])
+                return await asyncio.gather(*futures)
+
+        out = asyncio.run(_run())
+        assert out[:-1] == [1] * 20
+        assert out[-1] == 2
+
+    def test_exception_raised(self, async_name):
+        """ Remote exceptions should propagate through the awaitable. """
+
+        async def _run():
+            async with get_async_proxy(async_name) as proxy:
+                return await proxy["not_a_key"]
+
+        with pytest.raises(KeyError):
+            asyncio.run(_run())
+
+
+class TestUnixSocket:
+    """ Tests for binding servers to unix domain sockets or TCP ports. """
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no unix sockets")
+    def test_unix_socket(self):
+        """ The registry should store a socket path and the pid. """
+        name = "unix_socket_dict"
+        proxy = transcend({"a": 1}, name, unix_socket=True)
+        socket_path, pid = get_registry()[name]
+        assert Path(socket_path).exists()
+        assert proxy["a"] == 1
+        terminate(name)
+        assert not Path(socket_path).exists()
+
+    def test_tcp(self):
+        """ The registry should store host, port and pid for TCP servers. """
+        name = "tcp_dict"
+        proxy = transcend({"a": 1}, name, unix_socket=False)
+        host, port, pid = get_registry()[name]
+        assert isinstance(port, int)
+        assert proxy["a"] == 1
+        terminate(name)
+
+
+class TestProxyPool:
+    """ Tests for reusing proxies within a process. """
+
+    @pytest.fixture(scope="class")
+    def pool_name(self):
+        """ Transcend a dict, return its name. """
+        name = "pooled_dict"
+        transcend({"a": 1}, name)
+        yield name
+        terminate(name)
+
+    def test_proxy_reused(self, pool_name):
+        """ Getting the same name twice should return the same proxy. """
+        assert get_proxy(pool_name) is get_proxy(pool_name)
+
+    def test_unpooled_proxy(self, pool_name):
+        """ Pooling can be turned off per call. """
+        assert get_proxy(pool_name, pooled=False) is not get_proxy(pool_name)
+
+    def test_terminated_proxy_not_reused(self):
+        """ A new server under an old name should get a new proxy. """
+        name = "pooled_restart"
+        proxy1 = transcend({"a": 1}, name)
+        terminate(name)
+        proxy2 = transcend({"a": 2}, name)
+        assert proxy1 is not proxy2
+        assert proxy2["a"] == 2
+        terminate(name)
+
+    def test_eviction_keeps_proxies_in_use(self):
+        """ Proxies dropped from the pool should keep working while held. """
+        names = ["evicted_in_use_1", "evicted_in_use_2"]
+        set_proxy_pool_options(idle_timeout=0.01)
+        try:
+            proxy = transcend({"a": 1}, names[0])
+            time.sleep(0.05)
+            transcend({}, names[1])
+            assert proxy["a"] == 1
+            assert names[0] in get_registry()
+        finally:
+            set_proxy_pool_options(idle_timeout=300.0)
+            for name in names:
+                terminate(name)
+
+    def test_transcend_keeps_pooled_proxies(self):
+        """ Forking a server mustn't disturb proxies pooled by the parent. """
+        names = ["pooled_before_fork_1", "pooled_before_fork_2"]
+        transcend({"a": 1}, names[0])  # the pool holds the only reference
+        transcend({}, names[1])
+        proxy = get_proxy(names[0])
+        for _ in range(10):
+            assert proxy["a"] == 1
+            assert proxy.get("a") == 1
+        for name in names:
+            terminate(name)
+
+    def test_del_after_failed_init(self):
+        """ A proxy whose __init__ failed shouldn't error when collected. """
+        proxy = SrpoProxy.__new__(SrpoProxy)
+        proxy.__del__()
+
+
+class TestServerPoll:
+    """ Tests for how servers wait for requests on idle connections. """
+
+    @pytest.mark.skipif(not hasattr(select, "epoll"), reason="needs epoll")
+    def test_registered_while_polling(self):
+        """ Connections registered during a poll should be seen by it. """
+        poll = _EpollPoll()
+        reader, writer = socket.socketpair()
+        with ThreadPoolExecutor(1) as executor:
+            future = executor.submit(poll.poll, 5)
+            time.sleep(0.05)
+            poll.register(reader.fileno(), "reh")
+            writer.send(b"x")
+            assert future.result(timeout=1) == [(reader.fileno(), "r")]
+        reader.close()
+        writer.close()
+
+
+class TestServerStartup:
+    """ Tests for the readiness handshake between transcend and the server. """
+
+    def test_registered_once_listening(self):
+        """ The name should be registered as soon as transcend returns. """
+        name = "startup_dict"
+        proxy = transcend({"a": 1}, name)
+        assert name in get_registry()
+        assert proxy["a"] == 1
+        terminate(name)
+
+    def test_failed_start_raises(self):
+        """ A server which can't bind should raise rather than hang. """
+        with socket.socket() as sock:
+            sock.bind(("localhost", 0))
+            sock.listen()
+            port = sock.getsockname()[1]
+            with pytest.raises(SrpoConnectionError):
+                transcend({}, "startup_bad_port", port=port, unix_socket=False)
+        assert "startup_bad_port" not in get_registry()
+
+
+class TestWarmPool:
+    """ Tests for handing objects to pre-spawned server processes. """
+
+    @pytest.fixture
+    def warm_pool(self):
+        """ Start a warm pool, stop it after the test. """
+        start_warm_pool(2)
+        pool = srpo.core._WARM_POOL
+        assert pool.wait()
+        yield pool
+        stop_warm_pool()
+
+    def test_object_sent_to_idle_process(self, warm_pool):
+        """ The server should run in one of the pre-spawned processes. """
+        pids = {pid for pid, _, _ in warm_pool._workers}
+        name = "warm_dict"
+        proxy = transcend({"a": 1}, name)
+        assert get_registry()[name][-1] in pids
+        assert proxy["a"] == 1
+        # the pool should be refilled
+        assert warm_pool.wait()
+        assert len(warm_pool._workers) == 2
+        terminate(name)
+
+    def test_unpicklable_object_forked(self, warm_pool):
+        """ Objects which can't be pickled still transcend by forking. """
+        pids = {pid for pid, _, _ in warm_pool._workers}
+        name = "warm_unpicklable"
+
+        class Local:
+            def value(self):
+                return 1
+
+        proxy = transcend(Local(), name)
+        assert get_registry()[name][-1] not in pids
+        assert proxy.value() == 1
+        terminate(name)
+
+    def test_refilled_by_spawner(self, warm_pool):
+        """ Replacement processes are forked by the spawner, not the caller. """
+        name = "warm_refill"
+        transcend({"a": 1}, name)
+        assert warm_pool.wait()
+        for pid, _, _ in warm_pool._workers:
+            assert psutil.Process(pid).ppid() == warm_pool._spawner.pid
+        terminate(name)
+
+    def test_class_unknown_to_idle_process_forked(
+        self, warm_pool, tmp_path, monkeypatch
+    ):
+        """ Classes the idle processes can't import fall back to forking. """
+        pids = {pid for pid, _, _ in warm_pool._workers}
+        module = tmp_path / "warm_pool_late_module.py"
+        module.write_text("class Late:\n    def value(self):\n        return 2\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        from warm_pool_late_module import Late
+
+        name = "warm_late"
+        proxy = transcend(Late(), name)
+        assert get_registry()[name][-1] not in pids
+        assert proxy.value() == 2
+        terminate(name)
+
+
+class TestAttrCache:
+    """ Tests for caching attribute values on the proxy. """
+
+    @pytest.fixture(scope="class")
+    def cached_proxy(self):
+        """ Transcend a namespace, return a proxy which caches attributes. """
+        name = "cached_namespace"
+        transcend(SimpleNamespace(bob=2, items=[]), name)
+        yield get_proxy(name, cache_attrs=True)
+        terminate(name)
+
+    def test_attr_cached(self, cached_proxy):
+        """ A second fetch should be served from the cache. """
+        assert cached_proxy.bob == 2
+        assert "bob" in cached_proxy._attr_cache
+        version = cached_proxy._attr_cache["bob"][0]
+        assert cached_proxy.obj.get_attr_if_changed("bob", version)[1] is None
+        assert cached_proxy.bob == 2
+
+    def test_setattr_invalidates(self, cached_proxy):
+        """ Setting an attribute should change the version. """
+        assert cached_proxy.bob == 2
+        with cached_proxy.batch() as batch:
+            batch.set_attr("bob", 3)
+        assert cached_proxy.bob == 3
+
+    def test_missing_attr_raises(self, cached_proxy):
+        """ Missing attributes should still raise. """
+        with pytest.raises(AttributeError):
+            _ = cached_proxy.not_bob
+
+
+class TestProxySchema:
+    """ Tests for fetching the object schema and caching proxy classes. """
+
+    @pytest.fixture(scope="class")
+    def two_dicts(self):
+        """ Transcend two dicts, return the names. """
+        names = ["schema_dict_1", "schema_dict_2"]
+        for name in names:
+            transcend({"name": name}, name)
+        yield names
+        for name in names:
+            terminate(name)
+
+    def test_proxy_class_shared(self, two_dicts):
+        """ Proxies to objects of the same type should share a class. """
+        proxy1, proxy2 = [get_proxy(x) for x in two_dicts]
+        assert type(proxy1) is type(proxy2)
+        assert isinstance(proxy1, SrpoProxy)
+        assert "keys" in vars(type(proxy1))
+        assert proxy1["name"] != proxy2["name"]
+
+    def test_schema_has_methods_and_attrs(self, two_dicts):
+        """ The schema should describe the remote object. """
+        proxy = get_proxy(two_dicts[0])
+        schema = loads(proxy.obj.proxy_schema())
+        assert schema["type_name"] == "builtins.dict"
+        assert "keys" in schema["methods"]
+        assert proxy.keys.__doc__ == dict.keys.__doc__
+
+    def test_schema_sent_with_registration(self, two_dicts):
+        """ Registering sends the schema unless the proxy already has it. """
+        proxy = get_proxy(two_dicts[0])
+        proxy_id = ("test_schema_sent_with_registration", os.getpid())
+        key, schema = proxy.obj.register_proxy(proxy_id)
+        assert loads(schema)["type_name"] == "builtins.dict"
+        assert proxy.obj.register_proxy(proxy_id, (key,)) == (key, None)
+        proxy.obj.deregister_proxy(proxy_id)
+
+
+class TestStreaming:
+    """ Tests for streaming iterators from transcended objects in chunks. """
+
+    @pytest.fixture(scope="class")
+    def counter(self):
+        """ Transcend an object with a generator method. """
+
+        class Counter(dict):
+            def count(self, stop):
+                """ Yield numbers up to stop. """
+                yield from range(stop)
+
+        name = "streaming_counter"
+        yield transcend(Counter({x: x for x in range(2500)}), name)
+        terminate(name)
+
+    @pytest.fixture
+    def small_chunks(self):
+        """ Use small chunks so several messages are needed. """
+        old = srpo.core._STREAM_STATE["chunk_size"]
+        set_stream_chunk_size(100)
+        yield
+        set_stream_chunk_size(old)
+
+    def test_iterate_object(self, counter, small_chunks):
+        """ Iterating the proxy should yield all keys. """
+        assert list(counter) == list(range(2500))
+
+    def test_generator_method(self, counter, small_chunks):
+        """ Methods returning generators should stream their items. """
+        out = counter.count(250)
+        assert isinstance(out, types.GeneratorType)
+        assert list(out) == list(range(250))
+
+    def test_partial_iteration_closes(self, counter, small_chunks):
+        """ Abandoning a stream should free the server-side iterator. """
+        out = counter.count(1000)
+        assert next(out) == 0
+        out.close()
+        assert not counter.obj._iterators
+
+    def test_contains(self, counter):
+        """ Membership checks should not iterate. """
+        assert 10 in counter
+        assert -1 not in counter
+
+    def test_async_iteration(self, counter, small_chunks):
+        """ Async proxies should support async iteration. """
+
+        async def _run():
+            async with get_async_proxy(counter) as proxy:
+                keys = [x async for x in proxy]
+                gen = await proxy.count(150)
+                return keys, [x async for x in gen]
+
+        keys, counts = asyncio.run(_run())
+        assert keys == list(range(2500))
+        assert counts == list(range(150))
+
+
+class TestBulkItems:
+    """ Tests for getting, setting and deleting many items at once. """
+
+    @pytest.fixture(scope="class")
+    def bulk_dict(self):
+        """ Transcend a dict served by several threads. """
+        name = "bulk_dict"
+        yield transcend({}, name, server_threads=4)
+        terminate(name)
+
+    def test_set_and_get_many(self, bulk_dict):
+        """ Items set in bulk should come back in key order. """
+        bulk_dict.set_many({"a": 1, "b": 2})
+        bulk_dict.set_many([("c", 3)])
+        assert bulk_dict.get_many(["c", "a", "b"]) == [3, 1, 2]
+
+    def test_get_many_missing(self, bulk_dict):
+        """ Missing keys raise unless a default is given. """
+        with pytest.raises(KeyError):
+            bulk_dict.get_many(["not_a_key"])
+        assert bulk_dict.get_many(["not_a_key"], default=None) == [None]
+
+    def test_delete_many(self, bulk_dict):
+        """ Deleting should remove present keys and ignore missing ones. """
+        bulk_dict.set_many({"x": 1, "y": 2})
+        bulk_dict.delete_many(["x", "y", "not_a_key"])
+        assert "x" not in bulk_dict and "y" not in bulk_dict
+
+    def test_bulk_ops_are_atomic(self, bulk_dict):
+        """ Readers should never see half of a bulk write. """
+        keys = [f"k{x}" for x in range(50)]
+        bulk_dict.set_many({x: 0 for x in keys})
+        other = get_proxy("bulk_dict", pooled=False)
+        torn = []
+
+        def _read():
+            for _ in range(20):
+                values = other.get_many(keys)
+                if len(set(values)) != 1:
+                    torn.append(values)
+
+        thread = threading.Thread(target=_read)
+        thread.start()
+        for value in range(1, 21):
+            bulk_dict.set_many({x: value for x in keys})
+        thread.join()
+        other.close()
+        assert not torn
+
+
+class TestMetrics:
+    """ Tests for per-method metrics on servers and proxies. """
+
+    @pytest.fixture(scope="class")
+    def metrics_dict(self):
+        """ Transcend a dict and call some methods on it. """
+        name = "metrics_dict"
+        proxy = transcend({"a": 1}, name)
+        proxy.obj.reset_metrics()
+        proxy.keys()
+        proxy.keys()
+        with pytest.raises(KeyError):
+            proxy.pop("not_a_key")
+        yield proxy
+        terminate(name)
+
+    def test_server_metrics(self, metrics_dict):
+        """ The server should count calls, errors, bytes and latencies. """
+        stats = loads(metrics_dict.obj.metrics())
+        assert stats["keys"]["calls"] == 2
+        assert stats["pop"]["errors"] == 1
+        assert stats["keys"]["bytes_in"] > 0 and stats["keys"]["bytes_out"] > 0
+        latencies = stats["keys"]["latencies"]
+        assert set(latencies) == {"queue_wait", "execution"}
+        assert sum(latencies["execution"]["counts"]) == 2
+
+    def test_client_metrics(self, metrics_dict):
+        """ Proxies should record round trip times per method. """
+        stats = get_client_metrics()["metrics_dict.keys"]
+        assert stats["calls"] >= 2
+        assert "round_trip" in stats["latencies"]
+
+
+class TestProfiling:
+    """ Tests for profiling running servers. """
+
+    @pytest.fixture(scope="class")
+    def profiled_dict(self):
+        """ Transcend a dict to profile. """
+        name = "profiled_dict"
+        yield transcend({"a": 1}, name)
+        terminate(name)
+
+    def test_cprofile(self, profiled_dict):
+        """ The pstats table should include the methods called. """
+        profiled_dict.obj.start_profile()
+        profiled_dict.keys()
+        stats = marshal.loads(profiled_dict.obj.stop_profile())
+        assert any("keys" in func[2] for func in stats)
+
+    def test_sample(self, profiled_dict):
+        """ Sampling should return collapsed stacks. """
+        profiled_dict.obj.start_profile("sample", 0.001)
+        time.sleep(0.05)
+        lines = profiled_dict.obj.stop_profile().decode().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+
+    def test_start_and_stop_once(self, profiled_dict):
+        """ Only one profile can run at a time. """
+        profiled_dict.obj.start_profile()
+        with pytest.raises(RuntimeError):
+            profiled_dict.obj.start_profile()
+        profiled_dict.obj.stop_profile()
+        with pytest.raises(RuntimeError):
+            profiled_dict.obj.stop_profile()
+
+
+class ConcurrencyCounter:
+    """ Records the peak number of methods running at once. """
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _run(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.2)
+        with self._lock:
+            self.active -= 1
+
+    @srpo.read_only
+    def read(self):
+        self._run()
+
+    def write(self):
+        self._run()
+
+    def reset(self):
+        self.peak = 0
+
+
+class TestReadWriteConcurrency:
+    """ Tests for running read-only methods concurrently. """
+
+    @pytest.fixture(scope="class")
+    def counter(self):
+        """ Transcend a counter with reads and writes guarded separately. """
+        name = "rw_counter"
+        yield transcend(
+            ConcurrencyCounter(), name, server_threads=4, concurrency="rw"
+        )
+        terminate(name)
+
+    def _peak(self, proxy, methods):
+        """ Call methods at once from separate proxies, return the peak. """
+        proxy.reset()
+        proxies = [get_proxy(proxy._name, pooled=False) for _ in methods]
+        with ThreadPoolExecutor(len(methods)) as executor:
+            futures = [
+                executor.submit(getattr(x, method))
+                for x, method in zip(proxies, methods)
+            ]
+            for future in futures:
+                future.result()
+        for other in proxies:
+            other._release()
+        return proxy.peak
+
+    def test_reads_overlap(self, counter):
+        """ Read-only methods should run at the same time. """
+        assert self._peak(counter, ["read"] * 3) > 1
+
+    def test_writes_exclusive(self, counter):
+        """ Other methods should run alone. """
+        assert self._peak(counter, ["write", "read", "write"]) == 1
+
+    def test_schema_lists_read_methods(self, counter):
+        """ The read-only methods are sent to proxies in the schema. """
+        schema = loads(counter.obj.proxy_schema())
+        assert schema["read_methods"] == ["read"]
+
+    def test_bad_mode_raises(self):
+        """ Unknown concurrency modes should raise before forking. """
+        with pytest.raises(ValueError):
+            transcend({}, "bad_concurrency", concurrency="bob")
+
+
+class BusyDict(dict):
+    """ A dict whose mutating method leaves it inconsistent while it runs. """
+
+    busy = False
+
+    def work(self):
+        self.busy = True
+        self["x"] = 1
+        time.sleep(0.3)
+        del self["x"]
+        self.busy = False
+
+
+class TestGuardedDunders:
+    """ Attribute access, len and contains should wait for mutating methods. """
+
+    @pytest.fixture(scope="class", params=["serial", "rw"])
+    def busy_dict(self, request):
+        """ Transcend a BusyDict with several server threads. """
+        name = f"busy_dict_{request.param}"
+        kwargs = dict(server_threads=4, concurrency=request.param)
+        yield transcend(BusyDict(), name, **kwargs)
+        terminate(name)
+
+    @pytest.mark.parametrize(
+        "read", [lambda x: x.busy, len, lambda x: "x" in x], ids=["attr", "len", "in"]
+    )
+    def test_waits_for_mutating_method(self, busy_dict, read):
+        """ Reads from another proxy shouldn't see the object mid-update. """
+        worker = get_proxy(busy_dict._name, pooled=False)
+        reader = get_proxy(busy_dict._name, pooled=False)
+        with ThreadPoolExecutor(1) as executor:
+            future = executor.submit(worker.work)
+            time.sleep(0.1)
+            assert read(reader) == read(BusyDict())
+            future.result()
+        worker._release()
+        reader._release()
+
+
+class ReplicatedBank(dict):
+    """ A dict with read-only methods which report where they ran. """
+
+    reloads = 0
+
+    @srpo.read_only
+    def pid(self):
+        return os.getpid()
+
+    @srpo.read_only
+    def reload_count(self):
+        return self.reloads
+
+
+def _reload_bank(bank):
+    """ A replica reload hook. """
+    bank.reloads += 1
+
+
+class TestReplicas:
+    """ Tests for read replicas of transcended objects. """
+
+    @pytest.fixture(scope="class")
+    def replicated(self):
+        """ Transcend a bank with two read replicas. """
+        name = "replicated_bank"
+        yield transcend(ReplicatedBank(a=1), name, replicas=2)
+        terminate(name)
+
+    def test_reads_spread_over_replicas(self, replicated):
+        """ Read-only methods should run on the replicas in turn. """
+        pids = {replicated.pid() for _ in range(4)}
+        assert len(pids) == 2
+        assert replicated.obj.pid() not in pids
+
+    def test_replicas_registered(self, replicated):
+        """ Replicas should appear in the registry under the name. """
+        names = set(get_registry())
+        assert {"replicated_bank/replica/0", "replicated_bank/replica/1"} <= names
+
+    def test_writes_reach_replicas(self, replicated):
+        """ After a refresh replicas should see earlier writes. """
+        replicated["b"] = 2
+        replicated.refresh_replicas()
+        assert [replicated["b"] for _ in range(2)] == [2, 2]
+        assert replicated.get_many(["a", "b"]) == [1, 2]
+        assert sorted(replicated) == ["a", "b"]
+
+    def test_reload_hook(self):
+        """ A reload hook should refresh replicas in place. """
+        name = "reloaded_bank"
+        proxy = transcend(ReplicatedBank(), name, replicas=1, reload=_reload_bank)
+        pid = proxy.pid()
+        proxy["a"] = 1
+        proxy.refresh_replicas()
+        assert proxy.reload_count() >= 1
+        assert proxy.pid() == pid
+        terminate(name)
+
+    @pytest.mark.parametrize("interval", [None, 60])
+    def test_refresh_interval(self, interval):
+        """ Writes shouldn't refresh replicas before the interval is up. """
+        name = f"debounced_bank_{interval}"
+        proxy = transcend(ReplicatedBank(), name, replicas=1, refresh_interval=interval)
+        pid = proxy.pid()
+        for value in range(10):
+            proxy["a"] = value
+        time.sleep(0.3)
+        assert proxy.pid() == pid
+        assert "a" not in proxy
+        proxy.refresh_replicas()
+        assert proxy["a"] == 9 and proxy.pid() != pid
+        terminate(name)
+
+    def test_terminate_stops_replicas(self):
+        """ Terminating the object should stop its replicas. """
+        name = "terminated_bank"
+        proxy = transcend(ReplicatedBank(), name, replicas=1)
+        pid = proxy.pid()
+        terminate(name)
+        assert not any(x.startswith(name) for x in get_registry())
+        assert not psutil.pid_exists(pid) or (
+            psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+        )
+
+
+class TestSharded:
+    """ Tests for objects transcended in shards. """
+
+    @pytest.fixture(scope="class")
+    def sharded(self):
+        """ Transcend a dict in three shards. """
+        name = "sharded_dict"
+        proxy = transcend_sharded(dict, name, shards=3)
+        proxy.set_many({x: x * 2 for x in range(30)})
+        yield proxy
+        terminate(name)
+
+    def test_one_registry_entry(self, sharded):
+        """ All shards should be registered under one name. """
+        names = [x for x in get_registry() if x.startswith("sharded_dict")]
+        assert names == ["sharded_dict"]
+        assert isinstance(get_proxy("sharded_dict"), ShardedProxy)
+
+    def test_items_spread_over_shards(self, sharded):
+        """ Each item should live on the shard its key hashes to. """
+        sizes = [len(x) for x in sharded.shards]
+        assert sum(sizes) == len(sharded) == 30
+        assert all(sizes)
+        assert sharded.shards[shard_index(7, 3)][7] == 14
+
+    def test_item_access(self, sharded):
+        """ Items can be set, read and deleted through the proxy. """
+        sharded["bob"] = 1
+        assert sharded["bob"] == 1 and "bob" in sharded
+        assert sharded.get("bob") == 1 and sharded.get("bill", 2) == 2
+        del sharded["bob"]
+        assert "bob" not in sharded
+
+    def test_bulk_access(self, sharded):
+        """ Bulk operations should keep key order across shards. """
+        assert sharded.get_many([5, 1, 20]) == [10, 2, 40]
+        sharded.set_many({"a": 1, "b": 2})
+        sharded.delete_many(["a", "not_a_key"])
+        assert sharded.get_many(["a", "b"], default=None) == [None, 2]
+
+    def test_iteration_and_fan_out(self, sharded):
+        """ Iteration covers every shard; other methods run on each. """
+        assert set(range(30)) <= set(sharded)
+        assert len(sharded.keys()) == 3
+
+    def test_stable_shard_index(self):
+        """ Equal keys should map to the same shard. """
+        assert shard_index(1, 4) == shard_index(1.0, 4) == shard_index(True, 4)
+        assert shard_index(("a", 1), 7) == shard_index(("a", 1), 7)
+
+    def test_set_keys_stable_across_processes(self):
+        """ Frozensets shouldn't be sharded by their hash ordered pickles. """
+        key = "frozenset({'a', 'b', 'c', 'd', 'e'})"
+        code = f"from srpo.core import shard_index; print(shard_index({key}, 4))"
+        out = set()
+        for seed in range(1, 6):
+            env = dict(os.environ, PYTHONHASHSEED=str(seed))
+            run = subprocess.run(
+                [sys.executable, "-c", code], env=env, capture_output=True, text=True
+            )
+            out.add(run.stdout)
+        assert len(out) == 1
+
+    def test_unsupported_key_raises(self):
+        """ Keys which may hash differently in other processes should raise. """
+        with pytest.raises(TypeError):
+            shard_index(object(), 4)
+
+    def test_update_routed_by_key(self, sharded):
+        """ update should set each item on its own shard only. """
+        sharded.update({"x": 1}, y=2)
+        assert len(sharded) == len(set(sharded))
+        assert sharded.get_many(["x", "y"]) == [1, 2]
+        sharded.delete_many(["x", "y"])
+
+
+class Appender:
+    """ An object with a slow mutating method. """
+
+    def __init__(self):
+        self.items = []
+
+    def append(self, item):
+        time.sleep(0.01)
+        if item is None:
+            raise ValueError("can't append None")
+        self.items.append(item)
+
+    def count(self):
+        return len(self.items)
+
+
+class SlowDict(dict):
+    """ A dict with a slow way to set items. """
+
+    def slow_put(self, key, value):
+        time.sleep(0.1)
+        self[key] = value
+
+
+class TestOneWayCalls:
+    """ Tests for calls which don't wait for the server. """
+
+    @pytest.fixture()
+    def appender(self):
+        """ Transcend an appender whose append is one-way. """
+        name = "one_way_appender"
+        yield transcend(Appender(), name, one_way=["append"])
+        terminate(name)
+
+    def test_calls_return_immediately(self, appender):
+        """ One-way calls shouldn't wait for the method to run. """
+        start = time.perf_counter()
+        for item in range(20):
+            appender.append(item)
+        assert time.perf_counter() - start < 0.2
+        appender.flush()
+        assert appender.count() == 20
+        assert appender.items == list(range(20))
+
+    def test_next_call_sees_one_way_calls(self):
+        """ A proxy's calls should run after its earlier one-way calls. """
+        name = "unguarded_appender"
+        kwargs = dict(one_way=["append"], server_threads=2)
+        proxy = transcend(Appender(), name, **kwargs)
+        for item in range(20):
+            proxy.append(item)
+        assert proxy.count() == 20
+        terminate(name)
+
+    def test_item_access_sees_one_way_calls(self):
+        """ Item access, len and contains should wait for one-way calls. """
+        name = "one_way_slow_dict"
+        proxy = transcend(SlowDict(), name, server_threads=4)
+        try:
+            proxy.slow_put.nowait("k", 1)
+            assert "k" in proxy
+            proxy.slow_put.nowait("j", 2)
+            assert len(proxy) == 2
+            proxy.slow_put.nowait("i", 3)
+            assert proxy["i"] == 3
+            proxy.slow_put.nowait([], 3)  # unhashable key
+            with pytest.raises(SrpoOneWayError):
+                len(proxy)
+        finally:
+            terminate(name)
+
+    def test_nowait(self, appender):
+        """ Any method can be called without waiting with nowait. """
+        assert appender.count.nowait() is None
+        appender.flush()
+
+    def test_error_raised_on_next_call(self, appender):
+        """ Errors of one-way calls are raised by the next call. """
+        appender.append(None)
+        with pytest.raises(SrpoOneWayError):
+            appender.count()
+        assert appender.count() == 0
+
+    def test_error_raised_on_flush(self, appender):
+        """ Flush should raise errors of earlier one-way calls. """
+        appender.append(1)
+        appender.append(None)
+        with pytest.raises(SrpoOneWayError) as e:
+            appender.flush()
+        assert len(e.value.errors) == 1
+        appender.flush()
+
+
+class SlowSearch:
+    """ An object with an expensive read which counts its runs. """
+
+    def __init__(self):
+        self.runs = 0
+
+    @srpo.coalesce
+    def search(self, query):
+        self.runs += 1
+        time.sleep(0.3)
+        return [query] * 3
+
+    def scan(self, query):
+        self.runs += 1
+        time.sleep(0.3)
+        return query
+
+
+class TestCoalescing:
+    """ Tests for sharing runs of identical concurrent calls. """
+
+    @pytest.fixture()
+    def search(self):
+        """ Transcend a searcher whose search calls are coalesced. """
+        name = "coalesced_search"
+        yield transcend(SlowSearch(), name, server_threads=4)
+        terminate(name)
+
+    def _call_at_once(self, proxy, method, queries):
+        """ Call method with each query from separate proxies. """
+        proxies = [get_proxy(proxy._name, pooled=False) for _ in queries]
+        with ThreadPoolExecutor(len(queries)) as executor:
+            futures = [
+                executor.submit(getattr(x, method), query)
+                for x, query in zip(proxies, queries)
+            ]
+            out = [x.result() for x in futures]
+        for other in proxies:
+            other._release()
+        return out
+
+    def test_identical_calls_share_run(self, search):
+        """ Equal concurrent calls of a coalesced method run once. """
+        out = self._call_at_once(search, "search", ["bob"] * 4)
+        assert out == [["bob"] * 3] * 4
+        assert search.runs == 1
+        stats = loads(search.obj.metrics())["search"]
+        assert stats["calls"] == 4
+        assert "coalesced" in stats["latencies"]
+
+    def test_different_args_not_shared(self, search):
+        """ Calls with different arguments each run. """
+        out = self._call_at_once(search, "search", ["bob", "bill"])
+        assert out == [["bob"] * 3, ["bill"] * 3]
+        assert search.runs == 2
+
+    def test_other_methods_not_coalesced(self, search):
+        """ Methods which aren't marked run for every call. """
+        self._call_at_once(search, "scan", ["bob"] * 3)
+        assert search.runs == 3
+
+    def test_coalesce_by_name(self):
+        """ Methods can be coalesced by passing their names to transcend. """
+        name = "coalesced_by_name"
+        proxy = transcend(SlowSearch(), name, server_threads=4, coalesce=["scan"])
+        try:
+            assert self._call_at_once(proxy, "scan", ["bob"] * 3) == ["bob"] * 3
+            assert proxy.runs == 1
+        finally:
+            terminate(name)
+
+
+class Catalog(dict):
+    """ A dict with an expensive pure method which counts its runs. """
+
+    runs = 0
+
+    @srpo.memoize
+    def lookup(self, key, suffix=""):
+        self.runs += 1
+        return f"{self.get(key)}{suffix}"
+
+    def items_list(self, keys):
+        return [self.get(x) for x in keys]
+
+
+class TestMemoization:
+    """ Tests for caching results of methods on the server. """
+
+    @pytest.fixture()
+    def catalog(self):
+        """ Transcend a catalog whose lookup is memoized. """
+        name = "memoized_catalog"
+        proxy = transcend(Catalog(a=1), name, memoize=["items_list"])
+        yield proxy
+        terminate(name)
+
+    def test_repeat_calls_cached(self, catalog):
+        """ Equal calls should only run once. """
+        assert catalog.lookup("a") == catalog.lookup("a") == "1"
+        assert catalog.lookup("a", suffix="!") == "1!"
+        assert catalog.runs == 2
+        stats = loads(catalog.obj.memo_stats())
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert "memoized" in loads(catalog.obj.metrics())["lookup"]["latencies"]
+
+    def test_invalidated_by_setitem(self, catalog):
+        """ Setting an item should clear the cache. """
+        assert catalog.lookup("a") == "1"
+        catalog["a"] = 2
+        assert catalog.lookup("a") == "2"
+        assert catalog.runs == 2
+
+    def test_invalidated_by_mutating_call_and_setattr(self, catalog):
+        """ Methods which aren't read-only and setattr clear the cache. """
+        catalog.lookup("a")
+        catalog.update(a=3)
+        assert catalog.lookup("a") == "3"
+        with catalog.batch() as batch:
+            batch.set_attr("label", "bob")
+        catalog.lookup("a")
+        assert loads(catalog.obj.memo_stats())["misses"] == 3
+
+    def test_unhashable_args_not_cached(self, catalog):
+        """ Methods named in memoize are cached unless args are unhashable. """
+        assert catalog.items_list(("a", "b")) == [1, None]
+        assert catalog.items_list(["a"]) == [1]
+        assert catalog.items_list(("a", "b")) == [1, None]
+        stats = loads(catalog.obj.memo_stats())
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_errors_not_cached(self, catalog):
+        """ Calls which raise run every time. """
+        with pytest.raises(TypeError):
+            catalog.lookup()
+        assert loads(catalog.obj.memo_stats())["entries"] == 0
+
+
+class TestLazyProxy:
+    """ Tests for proxies which connect on first use. """
+
+    def test_connects_on_first_use(self, transcended_dict):
+        """ The proxy shouldn't connect until the object is used. """
+        proxy = get_proxy(transcended_dict._name, lazy=True, pooled=False)
+        assert not proxy.connected
+        assert "not connected" in repr(proxy)
+        assert proxy["simple"] is True
+        assert proxy.connected
+        assert set(proxy.keys()) == set(transcended_dict.keys())
+        assert len(proxy) == len(transcended_dict)
+        proxy._release()
+
+    def test_missing_name_raises_on_use(self):
+        """ Looking up the object is also deferred. """
+        proxy = get_proxy("not_a_transcended_object", lazy=True)
+        with pytest.raises(SrpoConnectionError):
+            proxy.keys()
+
+
+class TestRegistryBackends:
+    """ Tests for transcending with other registry backends. """
+
+    @pytest.mark.parametrize("scheme", ["dir", "shm"])
+    def test_transcend_and_terminate(self, tmp_path, scheme):
+        """ Objects can be registered, found and removed with each backend. """
+        if scheme == "dir":
+            path = f"dir://{tmp_path / 'registry'}"
+        else:
+            path = f"shm://srpo_test_{os.getpid()}_{tmp_path.name}"
+        registry = get_registry(path)
+        sharded = transcend_sharded(dict, "backend_dict", registry_path=path)
+        sharded["a"] = 1
+        proxy = get_proxy("backend_dict", registry_path=path, pooled=False)
+        assert proxy["a"] == 1
+        assert list(registry) == ["backend_dict"]
+        proxy._release()
+        terminate("backend_dict", registry_path=path)
+        assert not os.path.exists(registry.filename)